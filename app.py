@@ -1,36 +1,56 @@
+import importlib
+
 import streamlit as st
-from pages.summary import summary_page
-from pages.temporal_trends import temporal_trends_page
-from pages.vehicle_analysis import vehicle_analysis_page
-from pages.demographics import demographics_page
+from db_utils import pool_stats, query_cache_stats
 
 st.set_page_config(
     page_title="Traffic Violations Insight System",
     layout="wide"
 )
 
+# page → (module, render function); a page module (and plotly, which only
+# the pages use) is imported the first time that page is shown, so a cold
+# start only pays for the page on screen
+PAGES = {
+    "Summary Statistics": ("pages.summary", "summary_page"),
+    "Temporal Trends": ("pages.temporal_trends", "temporal_trends_page"),
+    "Vehicle Analysis": ("pages.vehicle_analysis", "vehicle_analysis_page"),
+    "Demographics": ("pages.demographics", "demographics_page"),
+}
+
 st.sidebar.title("Navigation")
 
 page = st.sidebar.radio(
     "Go to",
-    [
-        "Summary Statistics",
-        "Temporal Trends",
-        "Vehicle Analysis",
-        "Demographics"
-    ]
+    list(PAGES)
 )
 
 # -----------------------------
 # Page Routing
-if page == "Summary Statistics":
-    summary_page()
+# later reruns find the module in sys.modules
+module_name, render = PAGES[page]
+getattr(importlib.import_module(module_name), render)()
 
-if page == "Temporal Trends":
-    temporal_trends_page()
-
-if page == "Vehicle Analysis":
-    vehicle_analysis_page()
+# -----------------------------
+# Diagnostics
+with st.sidebar.expander("Diagnostics"):
+    stats = query_cache_stats()
+    st.markdown("**Query cache**")
+    st.caption(
+        f"hits {stats['hits']:,} · misses {stats['misses']:,} · "
+        f"hit rate {stats['hit_rate']:.0%}"
+    )
+    st.caption(
+        f"cached results {stats['size']} · evictions {stats['evictions']:,} · "
+        f"expired {stats['expirations']:,} · invalidations {stats['invalidations']:,}"
+    )
 
-if page == "Demographics":
-    demographics_page()
+    st.markdown("**Connection pools**")
+    for pool in pool_stats():
+        st.caption(
+            f"{pool['url']}  \n"
+            f"size {pool['pool_size']} · checked out {pool['checked_out']} · "
+            f"idle {pool['checked_in']} · overflow {pool['overflow']}  \n"
+            f"checkouts {pool['checkouts']:,} · wait avg {pool['wait_avg_ms']:.1f} ms · "
+            f"max {pool['wait_max_ms']:.1f} ms"
+        )
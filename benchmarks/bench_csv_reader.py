@@ -0,0 +1,91 @@
+"""
+Parse time and peak RSS of reading the raw CSV for the pipeline:
+pd.read_csv(chunksize=..., low_memory=False) over every column (previous
+reader) vs csv_reader.read_pipeline_chunks (pyarrow, projected + typed).
+
+Each reader runs in a fresh process over the whole file. Without --csv the
+synthetic CSV of --rows rows (benchmarks.generator, cached under
+benchmarks/data) is read.
+
+    python -m benchmarks.bench_csv_reader --rows 500000
+    python -m benchmarks.bench_csv_reader --csv Traffic_Violations.csv
+"""
+import argparse
+import gc
+import multiprocessing as mp
+import os
+import time
+
+from benchmarks.generator import ensure_dataset
+from benchmarks.memory import peak_kb, reset_peak, status_kb
+
+
+def _read_all(variant, csv_path, chunk_size):
+    import pandas as pd
+    from csv_reader import read_pipeline_chunks
+
+    if variant == "pandas":
+        chunks = pd.read_csv(csv_path, chunksize=chunk_size, low_memory=False)
+    else:
+        chunks = read_pipeline_chunks(csv_path, chunk_size)
+
+    rows = 0
+    chunk_mib = 0.0
+    for chunk in chunks:
+        rows += len(chunk)
+        chunk_mib = max(chunk_mib, chunk.memory_usage(deep=True).sum() / 2**20)
+    return rows, chunk_mib
+
+
+def _measure(variant, csv_path, chunk_size, result_queue):
+    import csv_reader  # noqa: F401  (import cost stays out of the numbers)
+    gc.collect()
+
+    exact = reset_peak()
+    before_kb = status_kb("VmRSS") if exact else 0
+
+    start = time.perf_counter()
+    rows, chunk_mib = _read_all(variant, csv_path, chunk_size)
+    seconds = time.perf_counter() - start
+
+    result_queue.put({
+        "variant": variant,
+        "rows": rows,
+        "seconds": seconds,
+        "peak_mib": peak_kb(exact, before_kb) / 1024,
+        "chunk_mib": chunk_mib,
+    })
+
+
+def measure(variant, csv_path, chunk_size):
+    ctx = mp.get_context("spawn")
+    result_queue = ctx.Queue()
+    proc = ctx.Process(target=_measure, args=(variant, csv_path, chunk_size, result_queue))
+    proc.start()
+    result = result_queue.get()
+    proc.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--csv", help="raw CSV to read (default: synthetic)")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    args = parser.parse_args()
+
+    csv_path = args.csv or ensure_dataset(args.rows)
+    size_mib = os.path.getsize(csv_path) / 2**20
+    results = [measure(variant, csv_path, args.chunk_size) for variant in ("pandas", "pyarrow")]
+
+    print(f"{csv_path if args.csv else 'synthetic CSV'}: {size_mib:,.0f} MiB, chunk size {args.chunk_size:,}")
+    for r in results:
+        rate = r["rows"] / r["seconds"]
+        print(
+            f"{r['variant']:<8} {r['rows']:>10,} rows  {r['seconds']:6.2f}s  {rate:>10,.0f} rows/sec  "
+            f"peak RSS growth {r['peak_mib']:7.1f} MiB  largest chunk {r['chunk_mib']:6.1f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
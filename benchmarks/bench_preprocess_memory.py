@@ -0,0 +1,69 @@
+"""
+Peak RSS of preprocess_chunk per 50k-row chunk: the typed, copy-minimal
+version vs the previous copy + replace({np.nan: None}) version.
+
+Each variant runs in a fresh process (see benchmarks.memory for how the
+peak is taken) on the first --rows rows of the synthetic CSV
+(benchmarks.generator), parsed by pd.read_csv as the previous pipeline did.
+
+    python -m benchmarks.bench_preprocess_memory --rows 50000
+"""
+import argparse
+import gc
+import multiprocessing as mp
+
+from benchmarks.generator import SIZES, ensure_dataset
+from benchmarks.memory import peak_kb, reset_peak, status_kb
+
+
+def _measure(variant, csv_path, rows, result_queue):
+    import pandas as pd
+    from benchmarks import legacy
+    from preprocess import preprocess_chunk
+
+    fn = {"typed": preprocess_chunk, "legacy": legacy.preprocess_chunk}[variant]
+
+    chunk = pd.read_csv(csv_path, nrows=rows, low_memory=False)
+    fn(chunk.head(100))  # warm imports / caches
+    gc.collect()
+
+    exact = reset_peak()
+    before_kb = status_kb("VmRSS") if exact else 0
+
+    clean = fn(chunk)
+
+    result_queue.put({
+        "variant": variant,
+        "peak_mib": peak_kb(exact, before_kb) / 1024,
+        "result_mib": clean.memory_usage(deep=True).sum() / 2**20,
+        "exact": exact,
+    })
+
+
+def measure(variant, csv_path, rows):
+    ctx = mp.get_context("spawn")
+    result_queue = ctx.Queue()
+    proc = ctx.Process(target=_measure, args=(variant, csv_path, rows, result_queue))
+    proc.start()
+    result = result_queue.get()
+    proc.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    # the suite's cached 100k file unless more rows are asked for
+    csv_path = ensure_dataset(max(args.rows, SIZES["100k"]))
+    results = [measure(variant, csv_path, args.rows) for variant in ("legacy", "typed")]
+
+    print(f"rows per chunk: {args.rows:,}")
+    for r in results:
+        kind = "peak RSS growth" if r["exact"] else "peak RSS (process)"
+        print(f"{r['variant']:<8} {kind}: {r['peak_mib']:8.1f} MiB   result frame: {r['result_mib']:6.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
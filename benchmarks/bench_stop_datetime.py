@@ -0,0 +1,73 @@
+"""
+Micro-benchmark: preprocess.build_stop_datetime vs the previous
+string round-trip implementation.
+
+    python -m benchmarks.bench_stop_datetime --rows 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from preprocess import build_stop_datetime
+from benchmarks import legacy
+
+
+def synthetic_date_time(rows, seed=0):
+    """Date Of Stop / Time Of Stop columns shaped like the county export"""
+    rng = np.random.default_rng(seed)
+
+    days = pd.date_range("2012-01-01", "2025-12-31", freq="D")
+    dates = pd.Series(days[rng.integers(0, len(days), rows)].strftime("%m/%d/%Y"))
+
+    seconds = rng.integers(0, 86_400, rows)
+    times = pd.Series(
+        [f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in seconds],
+        dtype=object,
+    )
+
+    # a few dotted times, bad values and missing values
+    dotted = rng.random(rows) < 0.01
+    times[dotted] = times[dotted].str.replace(":", ".", regex=False)
+    times[rng.random(rows) < 0.001] = "25:61:00"
+    times[rng.random(rows) < 0.001] = None
+    dates[rng.random(rows) < 0.001] = None
+
+    return pd.DataFrame({"Date Of Stop": dates, "Time Of Stop": times})
+
+
+def best_of(fn, df, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = synthetic_date_time(args.rows)
+
+    legacy_s, expected = best_of(legacy.build_stop_datetime, df, args.repeat)
+    fast_s, result = best_of(build_stop_datetime, df, args.repeat)
+
+    pd.testing.assert_series_equal(
+        result.astype("datetime64[ns]"),
+        expected.astype("datetime64[ns]"),
+        check_names=False,
+    )
+
+    print(f"rows          : {args.rows:,}")
+    print(f"legacy        : {legacy_s:8.3f}s  ({args.rows / legacy_s:,.0f} rows/sec)")
+    print(f"vectorized    : {fast_s:8.3f}s  ({args.rows / fast_s:,.0f} rows/sec)")
+    print(f"speedup       : {legacy_s / fast_s:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Synthetic Traffic_Violations.csv generator driven by
+column_profile_summary.csv.
+
+Every column draws its top values with the frequencies in the profile, the
+remaining mass from a tail sized to the profiled distinct count, and NULLs
+at the profiled rate. SeqID, dates, times and coordinates are generated per
+stop (a stop repeats over ~1.76 charge rows, as in the export) so the
+(seq_id, charge) primary key and the geo / time columns look realistic.
+
+    python -m benchmarks.generator --rows 1M
+    python -m benchmarks.generator --rows 100k --out /tmp/traffic_100k.csv
+"""
+import argparse
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROFILE_CSV = os.path.join(os.path.dirname(BENCH_DIR), "column_profile_summary.csv")
+DATA_DIR = os.path.join(BENCH_DIR, "data")
+
+SIZES = {"100k": 100_000, "1M": 1_000_000, "10M": 10_000_000}
+WRITE_ROWS = 100_000   # rows generated and appended per block
+
+# Montgomery County box for non-zero coordinates; date span of the export
+LATITUDE_RANGE = (38.93, 39.35)
+LONGITUDE_RANGE = (-77.53, -76.91)
+DATE_RANGE = ("2012-01-01", "2025-12-31")
+
+# generated per stop instead of from the profile
+STOP_COLUMNS = ["SeqID", "Date Of Stop", "Time Of Stop", "Latitude", "Longitude", "Geolocation"]
+
+_FLOAT_INT = re.compile(r"^-?\d+\.0$")
+
+
+def parse_rows(value):
+    """'100k' / '1M' / '2500000' → int"""
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([kKmM]?)", str(value).replace("_", ""))
+    if match is None:
+        raise argparse.ArgumentTypeError(f"invalid row count '{value}'")
+    number, suffix = match.groups()
+    scale = {"": 1, "k": 1_000, "m": 1_000_000}[suffix.lower()]
+    return int(float(number) * scale)
+
+
+# =====================================================
+# Profile → per-column distributions
+# =====================================================
+
+def load_profile(profile_csv=PROFILE_CSV):
+    """
+    {column: spec} with the top values and their probabilities among
+    non-null rows, the tail size / mass and the null fraction
+    """
+    profile = pd.read_csv(profile_csv, keep_default_na=False, dtype={"value": str})
+    specs = {}
+
+    for col, rows in profile.groupby("column", sort=False):
+        total_rows = int(rows["unique_values"].iloc[0] + rows["duplicate_values"].iloc[0])
+        null_fraction = float(rows["null_percentage"].iloc[0]) / 100
+        non_null = max(1.0, total_rows * (1 - null_fraction))
+
+        values = rows["value"].to_numpy(dtype=object)
+        # pandas read numeric columns as float: "2007.0" was "2007" in the CSV
+        if all(_FLOAT_INT.match(v) for v in values):
+            values = np.array([v[:-2] for v in values], dtype=object)
+
+        probs = rows["count"].to_numpy(dtype=float) / non_null
+        tail_count = int(rows["unique_values"].iloc[0]) - len(values)
+        tail_mass = max(0.0, 1.0 - probs.sum()) if tail_count > 0 else 0.0
+        probs = probs / (probs.sum() + tail_mass)  # normalise rounding
+
+        specs[col] = {
+            "values": values,
+            "cum_probs": np.cumsum(probs),
+            "tail_count": max(tail_count, 0),
+            "null_fraction": null_fraction,
+            "stop_repeat": total_rows / int(rows["unique_values"].iloc[0]) if col == "SeqID" else None,
+        }
+
+    return specs
+
+
+def _vocabulary_tail(col):
+    prefix = col.upper()
+    return lambda rng, n, count: np.array([f"{prefix} {i}" for i in rng.integers(0, count, n)], dtype=object)
+
+
+def _sample_column(rng, spec, rows, tail):
+    """top values by profiled frequency, the rest from tail(rng, n, tail_count)"""
+    pick = np.searchsorted(spec["cum_probs"], rng.random(rows), side="right")
+    in_tail = pick >= len(spec["values"])
+
+    out = np.empty(rows, dtype=object)
+    out[~in_tail] = spec["values"][pick[~in_tail]]
+
+    n_tail = int(in_tail.sum())
+    if n_tail:
+        out[in_tail] = tail(rng, n_tail, spec["tail_count"])
+
+    out[rng.random(rows) < spec["null_fraction"]] = None
+    return out
+
+
+# =====================================================
+# Per-stop columns
+# =====================================================
+
+def _stop_columns(rng, rows, specs):
+    repeat = specs["SeqID"]["stop_repeat"] or 1.0
+    n_stops = int(rows / repeat) + 2
+    charges = rng.geometric(1 / repeat, n_stops)
+    # the draws can fall short of `rows`; the last stop takes the rest
+    charges[-1] += max(0, rows - int(charges.sum()))
+    stop_of_row = np.repeat(np.arange(n_stops), charges)[:rows]
+    assert len(stop_of_row) == rows, (len(stop_of_row), rows)
+    n_stops = int(stop_of_row[-1]) + 1
+
+    # uuid-shaped ids from 128 random bits
+    hex_ids = [f"{a:016x}{b:016x}" for a, b in rng.integers(0, 2**63, (n_stops, 2), dtype=np.int64)]
+    seq_ids = np.array([f"{h[:8]}-{h[8:12]}-4{h[13:16]}-{h[16:20]}-{h[20:]}" for h in hex_ids], dtype=object)
+
+    # dates: profiled top days + uniform days over the export span
+    days = pd.date_range(*DATE_RANGE, freq="D").strftime("%m/%d/%Y").to_numpy(dtype=object)
+    dates = _sample_column(
+        rng, specs["Date Of Stop"], n_stops,
+        tail=lambda rng, n, _: days[rng.integers(0, len(days), n)],
+    )
+
+    minutes = rng.integers(0, 1_440, n_stops)
+    times = np.array([f"{m // 60:02d}:{m % 60:02d}:00" for m in minutes], dtype=object)
+
+    # (0.0, 0.0) at the profiled rate, otherwise a point in the county
+    lat_spec = specs["Latitude"]
+    zero_share = float(lat_spec["cum_probs"][0]) if lat_spec["values"][0] in ("0", "0.0") else 0.0
+    on_zero = rng.random(n_stops) < zero_share
+    lat = np.round(rng.uniform(*LATITUDE_RANGE, n_stops), 7)
+    lon = np.round(rng.uniform(*LONGITUDE_RANGE, n_stops), 7)
+    lat[on_zero] = 0.0
+    lon[on_zero] = 0.0
+    geo = np.array([f"({a}, {b})" for a, b in zip(lat, lon)], dtype=object)
+
+    per_stop = {
+        "SeqID": seq_ids,
+        "Date Of Stop": dates,
+        "Time Of Stop": times,
+        "Latitude": lat,
+        "Longitude": lon,
+        "Geolocation": geo,
+    }
+    return {col: values[stop_of_row] for col, values in per_stop.items()}
+
+
+def synthetic_frame(rows, seed=0, specs=None):
+    """one block of raw rows in the CSV's column order"""
+    specs = specs if specs is not None else load_profile()
+    rng = np.random.default_rng(seed)
+
+    data = _stop_columns(rng, rows, specs)
+    for col, spec in specs.items():
+        if col not in data:
+            data[col] = _sample_column(rng, spec, rows, _vocabulary_tail(col))
+
+    return pd.DataFrame(data, columns=list(specs))
+
+
+def generate_csv(path, rows, seed=0, profile_csv=PROFILE_CSV):
+    """writes `rows` synthetic rows to `path` in blocks; returns the path"""
+    specs = load_profile(profile_csv)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    tmp = path + ".tmp"
+    written = 0
+    block = 0
+    while written < rows:
+        n = min(WRITE_ROWS, rows - written)
+        frame = synthetic_frame(n, seed=seed * 1_000_003 + block, specs=specs)
+        frame.to_csv(tmp, mode="w" if block == 0 else "a", header=block == 0, index=False)
+        written += n
+        block += 1
+    os.replace(tmp, path)
+    return path
+
+
+def dataset_path(rows, seed=0):
+    return os.path.join(DATA_DIR, f"traffic_{rows}_{seed}.csv")
+
+
+def ensure_dataset(rows, seed=0):
+    """cached synthetic CSV for (rows, seed), generated on first use"""
+    path = dataset_path(rows, seed)
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        generate_csv(path, rows, seed)
+        print(f"[INFO] generated {rows:,} rows → {path} in {time.perf_counter() - start:.1f}s")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=parse_rows, default=SIZES["100k"], help="e.g. 100k, 1M, 10M")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help=f"output CSV (default: {DATA_DIR}/traffic_<rows>_<seed>.csv)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    path = generate_csv(args.out or dataset_path(args.rows, args.seed), args.rows, args.seed)
+    print(f"{args.rows:,} rows → {path} ({os.path.getsize(path) / 2**20:,.0f} MiB) in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Cold-start import cost of the dashboard, measured with `python -X importtime`
+in a fresh interpreter:
+
+    startup     the modules app.py imports at the top (read from app.py)
+    <page>      what selecting a page adds on top of startup
+
+and a check that startup does not import libraries only the pages need
+(plotly). Exits 1 when a budget is exceeded or that check fails, so it can
+gate changes; benchmarks.suite records the same numbers (--only imports).
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --repeat 5
+"""
+import argparse
+import ast
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+APP_FILE = os.path.join(REPO_DIR, "app.py")
+
+PAGE_MODULES = ["pages.summary", "pages.temporal_trends", "pages.vehicle_analysis", "pages.demographics"]
+
+# imported by the pages only; app.py's own imports must not pull them in
+PAGE_ONLY_PACKAGES = ["plotly"]
+
+# cumulative import time budgets (ms, median of the runs)
+BUDGETS_MS = {
+    "startup": 2_500,
+    "page": 1_500,
+}
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def startup_modules(app_file=APP_FILE):
+    """modules app.py imports at module level, in order"""
+    with open(app_file, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), app_file)
+
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def parse_importtime(stderr):
+    """-X importtime output → [(depth, module, self_us, cumulative_us)] in print order"""
+    entries = []
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match is not None:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append((len(indent) // 2, module, int(self_us), int(cumulative_us)))
+    return entries
+
+
+def import_profile(modules, after=()):
+    """
+    imports `after` then `modules` in a fresh interpreter; returns the
+    cumulative time (ms) and names of what `modules` added, or the error
+    """
+    code = "".join(f"import {m}\n" for m in list(after) + list(modules))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_DIR, capture_output=True, text=True,
+    )
+    entries = parse_importtime(proc.stderr)
+    if proc.returncode != 0:
+        lines = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+        return {"error": lines[-1] if lines else f"exit code {proc.returncode}"}
+
+    # importtime prints a module after its dependencies, so everything after
+    # the last top-level entry of `after` was imported for `modules`
+    start = 0
+    if after:
+        top_level = {m.split(".")[0] for m in after}
+        start = max(
+            (i + 1 for i, (depth, name, _, _) in enumerate(entries) if depth == 0 and name.split(".")[0] in top_level),
+            default=0,
+        )
+    added = entries[start:]
+    return {
+        "ms": sum(cumulative for depth, _, _, cumulative in added if depth == 0) / 1000,
+        "modules": [name for _, name, _, _ in added],
+    }
+
+
+def measure(repeat=3):
+    """{case: {"runs_ms": [...], "median_ms", "modules"} | {"error"}} for startup and every page"""
+    startup = startup_modules()
+    cases = {"startup": (startup, ())}
+    cases.update({page: ([page], startup) for page in PAGE_MODULES})
+
+    results = {}
+    for case, (modules, after) in cases.items():
+        runs = [import_profile(modules, after) for _ in range(repeat)]
+        if "error" in runs[0]:
+            results[case] = {"error": runs[0]["error"]}
+            continue
+        runs_ms = [run["ms"] for run in runs]
+        results[case] = {"runs_ms": runs_ms, "median_ms": statistics.median(runs_ms), "modules": runs[0]["modules"]}
+    return results
+
+
+def check(results):
+    """[problem, ...] for budgets exceeded and page-only packages loaded at startup"""
+    problems = []
+    for case, result in results.items():
+        if "error" in result:
+            continue
+        budget = BUDGETS_MS["startup" if case == "startup" else "page"]
+        if result["median_ms"] > budget:
+            problems.append(f"{case}: {result['median_ms']:,.0f} ms > budget {budget:,} ms")
+
+    startup = results.get("startup", {})
+    loaded = {name.split(".")[0] for name in startup.get("modules", [])}
+    for package in PAGE_ONLY_PACKAGES:
+        if package in loaded:
+            problems.append(f"startup imports {package}, which only the pages need")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"[INFO] startup modules (app.py): {', '.join(startup_modules())}")
+    results = measure(args.repeat)
+    for case, result in results.items():
+        if "error" in result:
+            print(f"[WARN] {case:<24} not importable here: {result['error']}")
+        else:
+            print(f"[STATS] {case:<24} {result['median_ms']:>8,.0f} ms  ({len(result['modules'])} modules)")
+
+    problems = check(results)
+    if all("error" in result for result in results.values()):
+        problems.append("nothing measured: install the dashboard dependencies")
+    if problems:
+        for problem in problems:
+            print(f"[WARN] {problem}")
+        sys.exit(1)
+    print("[SUCCESS] import times within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Reference copies of functions that were replaced by faster versions.
+
+Kept only so the benchmarks can compare against (and check equality with)
+the previous behaviour. Not used by the pipeline.
+"""
+import numpy as np
+import pandas as pd
+
+from preprocess import normalize_boolean, normalize_gender, normalize_state, normalize_text
+
+
+def build_stop_datetime(df: pd.DataFrame) -> pd.Series:
+    date = pd.to_datetime(df["Date Of Stop"], errors="coerce")
+
+    time = (
+        df["Time Of Stop"]
+        .astype(str)
+        .str.replace(".", ":", regex=False)
+    )
+    time = pd.to_datetime(time, format="%H:%M:%S", errors="coerce").dt.time
+
+    return pd.to_datetime(
+        date.astype(str) + " " + time.astype(str),
+        errors="coerce"
+    )
+
+
+def clean_coordinates(df: pd.DataFrame) -> pd.DataFrame:
+    df["Latitude"] = pd.to_numeric(df["Latitude"], errors="coerce")
+    df["Longitude"] = pd.to_numeric(df["Longitude"], errors="coerce")
+
+    df.loc[
+        (df["Latitude"] == 0) | (df["Longitude"] == 0),
+        ["Latitude", "Longitude"]
+    ] = np.nan
+
+    df.loc[~df["Latitude"].between(24, 50), "Latitude"] = np.nan
+    df.loc[~df["Longitude"].between(-125, -65), "Longitude"] = np.nan
+
+    return df
+
+
+def preprocess_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """copies the chunk, object dtypes, replace({np.nan: None}) at the end"""
+    chunk = chunk.copy()
+
+    # ---- datetime ----
+    chunk["stop_datetime"] = build_stop_datetime(chunk)
+
+    # ---- text normalization ----
+    text_cols = [
+        "Agency", "SubAgency", "Description", "Location",
+        "Search Disposition", "Search Outcome", "Search Reason",
+        "VehicleType", "Model", "Make", "Color",
+        "Charge", "Violation Type"
+    ]
+
+    for col in text_cols:
+        if col in chunk.columns:
+            chunk[col] = normalize_text(chunk[col])
+
+    # ---- demographics / codes ----
+    chunk["Gender"] = normalize_gender(chunk["Gender"])
+    chunk["Race"] = normalize_text(chunk["Race"])
+    chunk["State"] = normalize_state(chunk["State"])
+    chunk["DL State"] = normalize_state(chunk["DL State"])
+
+    # ---- boolean columns ----
+    boolean_cols = [
+        "Accident",
+        "Property Damage",
+        "Alcohol",
+        "Work Zone",
+        "Search Conducted",
+        "Personal Injury",
+        "Fatal"
+    ]
+
+    for col in boolean_cols:
+        if col in chunk.columns:
+            chunk[col] = normalize_boolean(chunk[col])
+
+    # ---- coordinates ----
+    chunk = clean_coordinates(chunk)
+
+    # ---- final column selection for DB / EDA ----
+    chunk = chunk[
+        [
+            "SeqID",
+            "Violation Type",
+            "stop_datetime",
+
+            "Agency",
+            "SubAgency",
+            "Location",
+            "Description",
+
+            "Latitude",
+            "Longitude",
+
+            "Accident",
+            "Property Damage",
+            "Alcohol",
+            "Work Zone",
+            "Personal Injury",
+            "Fatal",
+
+            "Search Conducted",
+            "Search Disposition",
+            "Search Outcome",
+            "Search Reason",
+
+            "VehicleType",
+            "Make",
+            "Model",
+            "Color",
+
+            "Charge",
+            "Race",
+            "Gender",
+            "State",
+            "DL State",
+        ]
+    ]
+
+
+    # ---- rename to DB-friendly names ----
+    chunk.columns = [
+        "seq_id",
+        "violation_type",
+        "stop_datetime",
+
+        "agency",
+        "subagency",
+        "location",
+        "description",
+
+        "latitude",
+        "longitude",
+
+        "accident",
+        "property_damage",
+        "alcohol",
+        "work_zone",
+        "personal_injury",
+        "fatal",
+
+        "search_conducted",
+        "search_disposition",
+        "search_outcome",
+        "search_reason",
+
+        "vehicle_type",
+        "make",
+        "model",
+        "color",
+
+        "charge",
+        "race",
+        "gender",
+        "state",
+        "dl_state",
+    ]
+
+    chunk = chunk.replace({np.nan: None})
+
+    return chunk
@@ -0,0 +1,19 @@
+"""
+Peak-RSS helpers for benchmarks that run each variant in a fresh process.
+
+On Linux the peak (VmHWM) can be reset right before the measured call, so
+the number is the growth that call caused; elsewhere ru_maxrss is used and
+includes setup.
+"""
+from instrumentation import peak_rss_mib, reset_peak_rss, status_kb  # noqa: F401  (status_kb re-exported)
+
+
+def reset_peak():
+    """returns True when the peak could be reset (Linux only)"""
+    return reset_peak_rss()
+
+
+def peak_kb(exact, before_kb):
+    if exact:
+        return status_kb("VmHWM") - before_kb
+    return peak_rss_mib() * 1024
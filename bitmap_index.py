@@ -0,0 +1,145 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+
+from duckdb_backend import DEDUPE, PARQUET_DATASET
+from parquet_sink import PARTITIONING
+from preprocess import FLAG_BITS, flags_from_columns
+
+# =====================================================
+# In-memory bitmap index over the incident flags
+# =====================================================
+# One packed bitmap (np.packbits, 1 bit per row) per incident flag over the
+# cleaned parquet data, with the rows sorted by stop_datetime. A combined
+# query such as
+#
+#     alcohol AND accident AND fatal, 2020-01-01 ≤ stop_datetime < 2021-01-01
+#
+# becomes a binary search for the row range, a bytewise AND of three
+# bitmaps over that range and a popcount: ~N/8 bytes touched per flag
+# instead of a scan over the columns. 7 flags cost ~1 byte per row in total.
+
+# set bits per byte value
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _read_flags(dataset):
+    """
+    (flags, stop_datetime) of every row. Files written before `flags`
+    existed only have the boolean columns, so each file is read with the
+    columns it has and those are packed here.
+    """
+    source = ds.dataset(dataset, format="parquet", partitioning=None if os.path.isfile(dataset) else PARTITIONING)
+    key = ["seq_id", "charge"] if DEDUPE else []
+
+    frames = []
+    for fragment in source.get_fragments():
+        has_flags = "flags" in fragment.physical_schema.names
+        columns = ["stop_datetime"] + key + (["flags"] if has_flags else list(FLAG_BITS))
+        df = fragment.to_table(columns=columns).to_pandas()
+        if not has_flags:
+            df["flags"] = flags_from_columns(df)
+        frames.append(df[["stop_datetime", "flags"] + key])
+    if not frames:
+        raise FileNotFoundError(f"no parquet files in {dataset}")
+    df = pd.concat(frames, ignore_index=True)
+
+    # same duplicate rule as the DuckDB views: one row per (seq_id, charge)
+    if DEDUPE:
+        df = df.drop_duplicates(key)
+
+    return df["flags"].to_numpy(dtype=np.uint8), df["stop_datetime"].to_numpy(dtype="datetime64[us]")
+
+
+class FlagBitmapIndex:
+    """
+    bitmaps of the FLAG_BITS flags over rows sorted by stop_datetime (rows
+    without one sort last and only match queries without a date range)
+    """
+
+    def __init__(self, flags, stop_datetime):
+        order = np.argsort(stop_datetime, kind="stable")  # NaT sorts last
+        flags = np.asarray(flags, dtype=np.uint8)[order]
+
+        self.stop_datetime = np.asarray(stop_datetime)[order]
+        self.rows = len(flags)
+        self.dated_rows = int(np.count_nonzero(~np.isnat(self.stop_datetime)))
+        self.bitmaps = {
+            name: np.packbits((flags >> np.uint8(bit)) & np.uint8(1))
+            for name, bit in FLAG_BITS.items()
+        }
+
+    @classmethod
+    def from_parquet(cls, dataset=PARQUET_DATASET):
+        if not os.path.exists(dataset):
+            raise FileNotFoundError(f"parquet data not found at {dataset} (run data_pipepline.py first)")
+        return cls(*_read_flags(dataset))
+
+    def nbytes(self):
+        return sum(bitmap.nbytes for bitmap in self.bitmaps.values()) + self.stop_datetime.nbytes
+
+    # ---- queries ----
+    def _row_range(self, start=None, end=None):
+        """[lo, hi) of the rows with start ≤ stop_datetime < end"""
+        if start is None and end is None:
+            return 0, self.rows
+        dated = self.stop_datetime[:self.dated_rows]
+        lo = 0 if start is None else int(np.searchsorted(dated, np.datetime64(pd.Timestamp(start), "us")))
+        hi = self.dated_rows if end is None else int(np.searchsorted(dated, np.datetime64(pd.Timestamp(end), "us")))
+        return lo, max(lo, hi)
+
+    def _match(self, flags, lo, hi):
+        """packed bitmap of bytes lo//8 … covering rows [lo, hi) with all `flags` set"""
+        unknown = sorted(set(flags) - set(FLAG_BITS))
+        if unknown:
+            raise ValueError(f"unknown flags {unknown}, expected some of {list(FLAG_BITS)}")
+
+        first, last = lo // 8, (hi + 7) // 8
+        if not flags:
+            match = np.full(last - first, 0xFF, dtype=np.uint8)
+        else:
+            match = self.bitmaps[flags[0]][first:last].copy()
+            for name in flags[1:]:
+                match &= self.bitmaps[name][first:last]
+
+        # packbits is big-endian within a byte: row 8k is bit 7 of byte k
+        if len(match):
+            match[0] &= np.uint8(0xFF >> (lo % 8))
+            match[-1] &= np.uint8((0xFF << ((8 - hi % 8) % 8)) & 0xFF)
+        return match
+
+    def count(self, flags=(), start=None, end=None):
+        """rows with every flag in `flags` set and start ≤ stop_datetime < end"""
+        lo, hi = self._row_range(start, end)
+        if lo == hi:
+            return 0
+        return int(_POPCOUNT[self._match(list(flags), lo, hi)].sum(dtype=np.int64))
+
+    def select(self, flags=(), start=None, end=None):
+        """stop_datetime of the matching rows"""
+        lo, hi = self._row_range(start, end)
+        if lo == hi:
+            return self.stop_datetime[:0]
+        rows = np.flatnonzero(np.unpackbits(self._match(list(flags), lo, hi))) + (lo // 8) * 8
+        return self.stop_datetime[rows]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="count rows with all the given incident flags set")
+    parser.add_argument("flags", nargs="*", help=f"some of {list(FLAG_BITS)}")
+    parser.add_argument("--start", help="stop_datetime ≥ start, e.g. 2020-01-01")
+    parser.add_argument("--end", help="stop_datetime < end")
+    parser.add_argument("--dataset", default=PARQUET_DATASET)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = FlagBitmapIndex.from_parquet(args.dataset)
+    print(f"[INFO] indexed {index.rows:,} rows in {time.perf_counter() - start:.2f}s ({index.nbytes() / 1e6:.1f} MB)")
+
+    start = time.perf_counter()
+    count = index.count(args.flags, args.start, args.end)
+    print(f"[STATS] {' AND '.join(args.flags) or 'all rows'}: {count:,} rows in {(time.perf_counter() - start) * 1000:.2f} ms")
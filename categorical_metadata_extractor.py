@@ -1,68 +1,184 @@
-import pandas as pd
-from collections import Counter, defaultdict
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Optional
 
+import pandas as pd
 from tqdm import tqdm
 
+from csv_reader import iter_chunks
+from sketches import CountMinTopK, HyperLogLog, hash_values
+
 CSV_PATH = "Traffic_Violations.csv"
 CHUNK_SIZE = 200_000
 TOP_N = 20   # top categories to keep per column
 
+# a column switches from exact counts to sketches (HyperLogLog distinct
+# count + Count-Min top values) once it has more distinct values than this
+EXACT_LIMIT = 100_000
+SKETCH_CAPACITY = 1_000   # heavy-hitter candidates kept per sketched column
+
+PARALLEL_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+MAX_IN_FLIGHT_CHUNKS = 2 * PARALLEL_WORKERS
+
+
+# -----------------------
+# Per-chunk work (runs in the worker processes)
+# -----------------------
+
+def profile_chunk(chunk: pd.DataFrame, sketched=frozenset(), exact_limit: int = EXACT_LIMIT):
+    """
+    Reduces one chunk to per-column partials:
+
+        ("exact", null_count, value_counts)
+        ("sketch", null_count, (hashes, counts, top_value_counts))
+
+    Columns in `sketched`, or with more than `exact_limit` distinct values in
+    this chunk, come back hashed so only numeric arrays are pickled back.
+    """
+    partials = {}
+
+    for col in chunk.columns:
+        series = chunk[col]
+
+        # normalize text lightly for profiling
+        counts = series.dropna().astype(str).str.strip().value_counts(sort=False)
+        null_count = int(series.isna().sum())
+
+        if col in sketched or len(counts) > exact_limit:
+            top = counts.nlargest(SKETCH_CAPACITY)
+            partials[col] = ("sketch", null_count, (hash_values(counts.index), counts.to_numpy(), top))
+        else:
+            partials[col] = ("exact", null_count, counts)
+
+    return len(chunk), partials
+
+
+# -----------------------
+# Merged state per column (main process)
+# -----------------------
+
+class ColumnProfile:
+    """exact value counts until `exact_limit` distinct values, then sketches"""
+
+    def __init__(self, exact_limit: int = EXACT_LIMIT):
+        self.exact_limit = exact_limit
+        self.null_count = 0
+        self.counts = pd.Series(dtype="int64")
+        self.distinct = None   # HyperLogLog once sketched
+        self.heavy = None      # CountMinTopK once sketched
+
+    @property
+    def sketched(self) -> bool:
+        return self.counts is None
+
+    def _add_hashed(self, hashes, counts, top):
+        self.distinct.add(hashes)
+        self.heavy.add(hashes, counts)
+        self.heavy.offer(top.index, hash_values(top.index))
+
+    def _switch_to_sketch(self):
+        counts, self.counts = self.counts, None
+        self.distinct = HyperLogLog()
+        self.heavy = CountMinTopK(capacity=SKETCH_CAPACITY)
+        self._add_hashed(hash_values(counts.index), counts.to_numpy(), counts.nlargest(SKETCH_CAPACITY))
+
+    def add(self, partial):
+        kind, null_count, payload = partial
+        self.null_count += null_count
+
+        if kind == "sketch" and not self.sketched:
+            self._switch_to_sketch()
+
+        if kind == "sketch":
+            self._add_hashed(*payload)
+        elif self.sketched:
+            self._add_hashed(hash_values(payload.index), payload.to_numpy(), payload.nlargest(SKETCH_CAPACITY))
+        else:
+            self.counts = self.counts.add(payload, fill_value=0).astype("int64")
+            if len(self.counts) > self.exact_limit:
+                self._switch_to_sketch()
+
+    def unique_count(self) -> int:
+        return self.distinct.count() if self.sketched else len(self.counts)
+
+    def top_values(self, n: int):
+        if self.sketched:
+            return self.heavy.top(n)
+        return [(value, int(count)) for value, count in self.counts.nlargest(n).items()]
+
+    def values(self):
+        return self.heavy.candidates if self.sketched else self.counts.index
+
 
 def profile_csv_columns(
     csv_path: str,
     columns: Optional[List[str]] = None,
     chunk_size: int = CHUNK_SIZE,
-    top_n: int = TOP_N
+    top_n: int = TOP_N,
+    workers: int = PARALLEL_WORKERS,
+    max_in_flight: int = MAX_IN_FLIGHT_CHUNKS,
+    exact_limit: int = EXACT_LIMIT,
 ):
     """
     Profiles categorical / nominal columns in a large CSV using chunking.
 
+    Chunks are reduced to value counts in a process pool (`workers` > 1)
+    and merged here; columns past `exact_limit` distinct values fall back to
+    sketches, so memory stays bounded whatever the CSV size. Their
+    unique_values and top_values are estimates (flagged as "approximate").
+
     Returns a dict with metadata per column.
     """
 
-    value_counters = defaultdict(Counter)
-    null_counts = Counter()
+    profiles = {}
     total_rows = 0
 
-    for chunk in tqdm(pd.read_csv(csv_path, chunksize=chunk_size, low_memory=False)):
-        if columns:
-            chunk = chunk[columns]
-
-        total_rows += len(chunk)
-
-        for col in chunk.columns:
-            series = chunk[col]
-
-            # count nulls
-            null_counts[col] += series.isna().sum()
-
-            # normalize text lightly for profiling
-            cleaned = (
-                series
-                .dropna()
-                .astype(str)
-                .str.strip()
-            )
-
-            value_counters[col].update(cleaned)
+    def merge(result):
+        nonlocal total_rows
+        rows, partials = result
+        total_rows += rows
+        for col, partial in partials.items():
+            profiles.setdefault(col, ColumnProfile(exact_limit)).add(partial)
+
+    def sketched():
+        return frozenset(col for col, profile in profiles.items() if profile.sketched)
+
+    # every column as text: the profile describes the raw values
+    reader = iter_chunks(csv_path, columns, chunk_size=chunk_size)
+
+    if workers <= 1:
+        for chunk in tqdm(reader):
+            merge(profile_chunk(chunk, sketched(), exact_limit))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool, tqdm() as progress:
+            pending = deque()
+            for chunk in reader:
+                pending.append(pool.submit(profile_chunk, chunk, sketched(), exact_limit))
+                while len(pending) >= max_in_flight:
+                    merge(pending.popleft().result())
+                    progress.update()
+            while pending:
+                merge(pending.popleft().result())
+                progress.update()
 
     # build report
     report = {}
 
-    for col, counter in value_counters.items():
-        unique_count = len(counter)
-        most_common = counter.most_common(top_n)
+    for col, profile in profiles.items():
+        unique_count = profile.unique_count()
+        most_common = profile.top_values(top_n)
         duplicate_count = total_rows - unique_count
         report[col] = {
             "total_rows": total_rows,
-            "null_count": null_counts[col],
-            "null_percentage": round((null_counts[col] / total_rows) * 100, 2),
+            "null_count": profile.null_count,
+            "null_percentage": round((profile.null_count / total_rows) * 100, 2),
             "unique_values": unique_count,
             "duplicate_values": duplicate_count,
             "top_values": most_common,
-            "possible_boolean": detect_boolean(counter),
-            "sample_values": [val for val, _ in most_common[:5]]
+            "possible_boolean": detect_boolean(profile.values()),
+            "sample_values": [val for val, _ in most_common[:5]],
+            "approximate": profile.sketched,
         }
 
     return report
@@ -72,12 +188,12 @@ def profile_csv_columns(
 # Helpers
 # -----------------------
 
-def detect_boolean(counter: Counter) -> bool:
+def detect_boolean(values) -> bool:
     """
-    Detects if a column is likely boolean-like.
+    Detects if a column is likely boolean-like from its distinct values.
     """
     boolean_tokens = {"yes", "no", "y", "n", "true", "false", "1", "0"}
-    values = {str(v).lower() for v in counter.keys()}
+    values = {str(v).lower() for v in values}
 
     return values.issubset(boolean_tokens)
 
@@ -92,7 +208,8 @@ def print_report(report: dict):
         print(f"Column: {col}")
         print(f"Total rows     : {meta['total_rows']}")
         print(f"Null count     : {meta['null_count']} ({meta['null_percentage']}%)")
-        print(f"Unique values  : {meta['unique_values']}")
+        approx = " (approx.)" if meta.get("approximate") else ""
+        print(f"Unique values  : {meta['unique_values']}{approx}")
         print(f"Duplicate values: {meta['duplicate_values']}")
         print(f"Possible bool  : {meta['possible_boolean']}")
         print("Top values:")
@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import threading
+
+import pandas as pd
+
+from csv_reader import csv_header
+
+# =====================================================
+# Ingest checkpoint manifest
+# =====================================================
+# JSON file recording how much of the source CSV is in the database:
+#
+#   loaded_bytes / loaded_rows   prefix of the file fully loaded (rollups
+#                                refreshed); tail_hash guards against the
+#                                file having been rewritten since
+#   segment                      the load in progress: the byte range it
+#                                reads, every chunk written so far (row
+#                                offset, row count, content hash) and the
+#                                months those chunks touched
+#
+# A rerun reads only [loaded_bytes, EOF) (delta load). If the previous run
+# died, the same byte range is read again with the same chunking and
+# chunks whose hash is already recorded are skipped, not re-inserted.
+
+CHECKPOINT_VERSION = 1
+TAIL_BYTES = 64 << 10   # bytes before loaded_bytes that must be unchanged
+
+
+def _file_hash(path, start, end):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        f.seek(start)
+        digest.update(f.read(end - start))
+    return digest.hexdigest()
+
+
+def _last_line_end(path, size):
+    """offset just past the last newline before `size` (skips a partial last line)"""
+    with open(path, "rb") as f:
+        block = 1 << 16
+        pos = size
+        while pos > 0:
+            start = max(0, pos - block)
+            f.seek(start)
+            data = f.read(pos - start)
+            newline = data.rfind(b"\n")
+            if newline != -1:
+                return start + newline + 1
+            pos = start
+    return 0
+
+
+def chunk_hash(raw_chunk: pd.DataFrame) -> str:
+    """content hash of a raw chunk (values and row positions)"""
+    hashes = pd.util.hash_pandas_object(raw_chunk, index=True).to_numpy()
+    return hashlib.blake2b(hashes.tobytes(), digest_size=16).hexdigest()
+
+
+class IngestCheckpoint:
+    """
+    Manifest for one source CSV. Call plan() to get the byte range to read,
+    is_loaded() / mark_loaded() per chunk and complete() once the rollups
+    are refreshed. The manifest is rewritten (atomically) after every chunk.
+    """
+
+    def __init__(self, path, source, chunk_size):
+        self.path = path
+        self.source = os.path.abspath(source)
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self._hashes = {}  # chunk_no → hash of the chunk read in this run
+        self.state = self._load()
+
+    # ---- manifest file ----
+    def _empty_state(self):
+        return {
+            "version": CHECKPOINT_VERSION,
+            "source": self.source,
+            "header": csv_header(self.source),
+            "loaded_bytes": 0,
+            "loaded_rows": 0,
+            "tail_hash": None,
+            "segment": None,
+        }
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return self._empty_state()
+        with open(self.path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("version") != CHECKPOINT_VERSION or state.get("source") != self.source:
+            print(f"[WARN] Ignoring checkpoint {self.path} (different source or version)")
+            return self._empty_state()
+        return state
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=1)
+        os.replace(tmp, self.path)
+
+    def reset(self):
+        self.state = self._empty_state()
+        self.save()
+
+    # ---- planning ----
+    def _source_unchanged(self):
+        loaded = self.state["loaded_bytes"]
+        if self.state["header"] != csv_header(self.source):
+            return False
+        if os.path.getsize(self.source) < loaded:
+            return False
+        if loaded == 0:
+            return True
+        return _file_hash(self.source, max(0, loaded - TAIL_BYTES), loaded) == self.state["tail_hash"]
+
+    def plan(self):
+        """
+        (byte_offset, end_bytes, row_offset) to read this run. end_bytes is
+        None when there is nothing new.
+        """
+        if not self._source_unchanged():
+            print("[WARN] Source CSV changed since the last load; starting over from the first row")
+            self.reset()
+
+        segment = self.state["segment"]
+        if segment is not None and segment["chunk_size"] == self.chunk_size:
+            print(
+                f"[INFO] Resuming load of bytes {segment['byte_offset']:,}..{segment['end_bytes']:,} "
+                f"({len(segment['chunks'])} chunk(s) already loaded)"
+            )
+            return segment["byte_offset"], segment["end_bytes"], segment["row_offset"]
+
+        start = self.state["loaded_bytes"]
+        size = os.path.getsize(self.source)
+        # a first load reads to EOF, so a last row without a trailing newline
+        # is loaded too. A delta load holds back a partial last line, which
+        # the writer may still be appending to.
+        end = size if start == 0 else _last_line_end(self.source, size)
+        if end <= start:
+            return start, None, self.state["loaded_rows"]
+
+        self.state["segment"] = {
+            "byte_offset": start,
+            "end_bytes": end,
+            "row_offset": self.state["loaded_rows"],
+            "chunk_size": self.chunk_size,
+            "chunks": {},
+            "months": [],
+        }
+        self.save()
+        if start:
+            print(f"[INFO] Delta load: bytes {start:,}..{end:,} appended since the last run")
+        return start, end, self.state["loaded_rows"]
+
+    # ---- per chunk ----
+    def is_loaded(self, chunk_no, raw_chunk):
+        digest = chunk_hash(raw_chunk)
+        with self._lock:
+            self._hashes[chunk_no] = digest
+            done = self.state["segment"]["chunks"].get(str(chunk_no))
+            return done is not None and done["hash"] == digest
+
+    def mark_loaded(self, chunk_no, rows, row_offset, months):
+        with self._lock:
+            segment = self.state["segment"]
+            segment["chunks"][str(chunk_no)] = {
+                "row_offset": int(row_offset),
+                "rows": int(rows),
+                "hash": self._hashes.pop(chunk_no),
+            }
+            known = set(segment["months"])
+            known.update(None if m is None else str(m) for m in months)
+            segment["months"] = sorted(known, key=lambda m: (m is None, m or ""))
+            self.save()
+
+    def loaded_months(self):
+        """months touched by every chunk of the segment, this run or an earlier one"""
+        return {None if m is None else pd.Period(m, freq="M") for m in self.state["segment"]["months"]}
+
+    def complete(self):
+        """the segment is loaded and its rollups refreshed"""
+        segment = self.state["segment"]
+        end = segment["end_bytes"]
+        self.state["loaded_bytes"] = end
+        self.state["loaded_rows"] = segment["row_offset"] + sum(c["rows"] for c in segment["chunks"].values())
+        self.state["tail_hash"] = _file_hash(self.source, max(0, end - TAIL_BYTES), end)
+        self.state["segment"] = None
+        self.save()
@@ -0,0 +1,114 @@
+import csv
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+from preprocess import INPUT_COLUMNS, NUMERIC_INPUT_COLUMNS
+
+# =====================================================
+# Column-projected, typed CSV reading (pyarrow engine)
+# =====================================================
+# The raw CSV is parsed by pyarrow's multithreaded reader, restricted to the
+# columns a consumer needs and with their types fixed up front, so nothing
+# is parsed as object and then thrown away. Batches are re-cut to exactly
+# `chunk_size` rows to keep chunk sizes (and checkpoints) independent of
+# pyarrow's block size.
+
+BLOCK_SIZE = 1 << 20   # bytes parsed per pyarrow block
+
+# same spellings pd.read_csv treats as missing by default
+NULL_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None",
+    "n/a", "nan", "null",
+]
+
+
+def csv_header(csv_path):
+    with open(csv_path, "r", encoding="utf-8", newline="") as f:
+        return next(csv.reader(f))
+
+
+def pipeline_types():
+    """arrow types for the columns preprocess_chunk reads"""
+    return {
+        col: pa.float64() if col in NUMERIC_INPUT_COLUMNS else pa.string()
+        for col in INPUT_COLUMNS
+    }
+
+
+def _open_range(csv_path, byte_range):
+    """
+    source + ReadOptions for the whole file, or for the rows in
+    [start, end) bytes (start on a line boundary, header taken from line 1)
+    """
+    read_options = pacsv.ReadOptions(use_threads=True, block_size=BLOCK_SIZE)
+    if byte_range is None:
+        return csv_path, read_options
+
+    start, end = byte_range
+    end = os.path.getsize(csv_path) if end is None else end
+    source = pa.BufferReader(pa.memory_map(csv_path).read_at(end - start, start))
+    if start > 0:
+        read_options.column_names = csv_header(csv_path)
+    return source, read_options
+
+
+def iter_batches(csv_path, columns=None, types=None, chunk_size=50_000, byte_range=None):
+    """
+    Yields pyarrow Tables of `chunk_size` rows (the last one shorter) with
+    only `columns` (default: all), typed by `types` (default: string).
+    `byte_range=(start, end)` limits reading to that slice of the file.
+    """
+    columns = list(columns) if columns else csv_header(csv_path)
+    types = {col: (types or {}).get(col, pa.string()) for col in columns}
+
+    source, read_options = _open_range(csv_path, byte_range)
+    reader = pacsv.open_csv(
+        source,
+        read_options=read_options,
+        convert_options=pacsv.ConvertOptions(
+            include_columns=columns,
+            column_types=types,
+            null_values=NULL_VALUES,
+            strings_can_be_null=True,
+            quoted_strings_can_be_null=True,
+        ),
+    )
+
+    pending, pending_rows = [], 0
+    for batch in reader:
+        pending.append(batch)
+        pending_rows += batch.num_rows
+
+        if pending_rows >= chunk_size:
+            table = pa.Table.from_batches(pending)
+            start = 0
+            while pending_rows - start >= chunk_size:
+                yield table.slice(start, chunk_size)
+                start += chunk_size
+            pending = table.slice(start).to_batches()
+            pending_rows -= start
+
+    if pending_rows:
+        yield pa.Table.from_batches(pending)
+
+
+def iter_chunks(csv_path, columns=None, types=None, chunk_size=50_000, byte_range=None, row_offset=0):
+    """
+    Same as iter_batches but yields pandas DataFrames, indexed by row number
+    in the file (counting from `row_offset`) like pd.read_csv chunks.
+    """
+    offset = row_offset
+    for table in iter_batches(csv_path, columns, types, chunk_size, byte_range):
+        chunk = table.to_pandas()
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset += len(chunk)
+        yield chunk
+
+
+def read_pipeline_chunks(csv_path, chunk_size=50_000, byte_range=None, row_offset=0):
+    """raw chunks holding just what preprocess_chunk needs"""
+    return iter_chunks(csv_path, INPUT_COLUMNS, pipeline_types(), chunk_size, byte_range, row_offset)
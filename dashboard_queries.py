@@ -0,0 +1,309 @@
+from datetime import date
+
+from sqlalchemy import text
+
+from dimensions import COLUMN_DIMENSIONS
+from filters import AnyOf, CompiledQuery, DateRange, Equals, InDimension, NotNull, Prefix, compile_query
+
+# =====================================================
+# Dashboard SQL
+# =====================================================
+# Every query the pages run, kept out of the streamlit modules so they can
+# be run without the UI (benchmarks/suite.py times each of them). Static
+# queries are text() constants; filtered ones are templates with a {where}
+# slot, compiled with a filter spec (filters.py) into a CompiledQuery.
+
+# date range the filtered pages open with
+DEFAULT_START_DATE = date(2016, 1, 1)
+DEFAULT_END_DATE = date(2023, 12, 31)
+
+# ---- demographics (rollup_demographics) ----
+
+RACE_TOTALS = text("""
+    SELECT
+        race,
+        CAST(SUM(total) AS SIGNED) AS total
+    FROM rollup_demographics
+    WHERE race IS NOT NULL
+    GROUP BY race
+    ORDER BY total DESC
+""")
+
+GENDER_TOTALS = text("""
+    SELECT
+        gender,
+        CAST(SUM(total) AS SIGNED) AS total
+    FROM rollup_demographics
+    WHERE gender IS NOT NULL
+    GROUP BY gender
+""")
+
+SEARCH_RATE_BY_RACE = text("""
+    SELECT
+        race,
+        SUM(searched) / NULLIF(SUM(search_known), 0) AS search_rate
+    FROM rollup_demographics
+    WHERE race IS NOT NULL
+    GROUP BY race
+    ORDER BY search_rate DESC
+""")
+
+# ---- vehicle analysis (rollup_vehicle) ----
+
+VEHICLE_TYPE_TOTALS = text("""
+    SELECT
+        vehicle_type,
+        CAST(SUM(total) AS SIGNED) AS total
+    FROM rollup_vehicle
+    WHERE vehicle_type IS NOT NULL
+    GROUP BY vehicle_type
+    ORDER BY total DESC
+    LIMIT 15
+""")
+
+MAKE_TOTALS = text("""
+    SELECT
+        make,
+        CAST(SUM(total) AS SIGNED) AS total
+    FROM rollup_vehicle
+    WHERE make IS NOT NULL
+    GROUP BY make
+    ORDER BY total DESC
+    LIMIT 15
+""")
+
+MAKE_MODEL_TOTALS = text("""
+    SELECT
+        make,
+        model,
+        CAST(SUM(total) AS SIGNED) AS total
+    FROM rollup_vehicle
+    WHERE make IS NOT NULL AND model IS NOT NULL
+    GROUP BY make, model
+    ORDER BY total DESC
+    LIMIT 100
+""")
+
+# ---- temporal trends (rollup_daily_hourly) ----
+
+MONTHLY_TREND = """
+    SELECT
+        DATE_FORMAT(stop_date, '%Y-%m') AS month,
+        CAST(SUM(total) AS SIGNED) AS total
+    FROM rollup_daily_hourly
+    WHERE {where}
+    GROUP BY month
+    ORDER BY month
+"""
+
+HOUR_WEEKDAY = """
+    SELECT
+        stop_hour AS hour,
+        DAYOFWEEK(stop_date) AS weekday,
+        CAST(SUM(total) AS SIGNED) AS total
+    FROM rollup_daily_hourly
+    WHERE {where}
+    GROUP BY hour, weekday
+"""
+
+
+def temporal_filter(start_date, end_date, violation_type="All"):
+    """
+    filter spec over rollup_daily_hourly; the date range covers whole days,
+    end date included
+    """
+    return (
+        DateRange("stop_date", start_date, end_date),
+        Equals("violation_type", None if violation_type == "All" else violation_type),
+    )
+
+
+def monthly_trend_query(spec):
+    return compile_query(MONTHLY_TREND, spec)
+
+
+def hour_weekday_query(spec):
+    return compile_query(HOUR_WEEKDAY, spec)
+
+# ---- summary (traffic_violations) ----
+
+# multiselect options: value counts from rollup_filter_values (maintained
+# by the pipeline), most frequent first, FILTER_PAGE_SIZE per page
+FILTER_PAGE_SIZE = 50
+
+FILTER_VALUES = """
+    SELECT
+        value,
+        CAST(SUM(total) AS SIGNED) AS total
+    FROM rollup_filter_values
+    WHERE {where}
+    GROUP BY value
+    ORDER BY total DESC, value
+    LIMIT :limit OFFSET :offset
+"""
+
+# multiselect filters bound as expanding IN lists
+LIST_FILTERS = ["state", "charge", "agency", "subagency"]
+
+# the fact table stores dimension keys (dimensions.py): filters match
+# them through the dimension tables, and the values shown are joined in
+# after any GROUP BY
+
+SUMMARY_ROWS = """
+    SELECT
+        f.latitude,
+        f.longitude,
+        vt.value AS violation_type,
+        f.charge
+    FROM traffic_violations f
+    LEFT JOIN dim_violation_type vt ON vt.id = f.violation_type_id
+    WHERE {where}
+    LIMIT 50000
+"""
+
+# top states by violations over every matching row
+STATE_RANKING = """
+    SELECT
+        s.value AS state,
+        r.total
+    FROM (
+        SELECT
+            state_id,
+            COUNT(*) AS total
+        FROM traffic_violations
+        WHERE {where} AND state_id IS NOT NULL
+        GROUP BY state_id
+        ORDER BY total DESC
+        LIMIT 10
+    ) r
+    JOIN dim_state s ON s.id = r.state_id
+    ORDER BY r.total DESC
+"""
+
+# one row: violations, distinct stops, and the citation / search / accident
+# rates (each over the rows where that field is known)
+SUMMARY_KPIS = """
+    SELECT
+        COUNT(*) AS violations,
+        COUNT(DISTINCT seq_id) AS stops,
+        SUM(CASE WHEN violation_type_id = (SELECT id FROM dim_violation_type WHERE value = 'CITATION') THEN 1 ELSE 0 END)
+            / NULLIF(COUNT(violation_type_id), 0) AS citation_share,
+        SUM(CASE WHEN search_conducted THEN 1 ELSE 0 END)
+            / NULLIF(COUNT(search_conducted), 0) AS search_rate,
+        SUM(CASE WHEN accident THEN 1 ELSE 0 END)
+            / NULLIF(COUNT(accident), 0) AS accident_rate
+    FROM traffic_violations
+    WHERE {where}
+"""
+
+# per-cell counts, cells of :cell degrees
+GEO_BINS = """
+    SELECT
+        b.lat_bin,
+        b.lon_bin,
+        vt.value AS violation_type,
+        b.total
+    FROM (
+        SELECT
+            FLOOR(latitude / :cell) AS lat_bin,
+            FLOOR(longitude / :cell) AS lon_bin,
+            violation_type_id,
+            COUNT(*) AS total
+        FROM traffic_violations
+        WHERE {where}
+        GROUP BY lat_bin, lon_bin, violation_type_id
+    ) b
+    LEFT JOIN dim_violation_type vt ON vt.id = b.violation_type_id
+"""
+
+
+def filter_values_query(dimension, prefix="", page=0):
+    """one page of `dimension` values (with counts) starting with `prefix`"""
+    spec = (Equals("dimension", dimension), Prefix("value", prefix))
+    return compile_query(FILTER_VALUES, spec, limit=FILTER_PAGE_SIZE, offset=page * FILTER_PAGE_SIZE)
+
+
+def _list_filter(name, values):
+    table = COLUMN_DIMENSIONS.get(name)
+    if table is None:
+        return AnyOf(name, tuple(values))
+    return InDimension(name, table, tuple(values))
+
+
+def _yes_no(value):
+    return None if value == "All" else value == "Yes"
+
+
+def summary_filter(
+    start_date,
+    end_date,
+    state=(),
+    charge=(),
+    agency=(),
+    subagency=(),
+    violation_type="All",
+    alcohol="All",
+    search="All",
+):
+    """
+    filter spec for the summary page (rows with coordinates only). The
+    date range also bounds stop_year, the partition key, so MySQL reads
+    only those years.
+    """
+    return (
+        DateRange("stop_datetime", start_date, end_date, year_column="stop_year"),
+        NotNull("latitude"),
+        NotNull("longitude"),
+        *(_list_filter(name, values) for name, values in zip(LIST_FILTERS, (state, charge, agency, subagency))),
+        _list_filter("violation_type", () if violation_type == "All" else (violation_type,)),
+        Equals("alcohol", _yes_no(alcohol)),
+        Equals("search_conducted", _yes_no(search)),
+    )
+
+
+def summary_rows_query(spec):
+    return compile_query(SUMMARY_ROWS, spec)
+
+
+def state_ranking_query(spec):
+    return compile_query(STATE_RANKING, spec)
+
+
+def summary_kpis_query(spec):
+    return compile_query(SUMMARY_KPIS, spec)
+
+
+def geo_bins_query(spec, cell):
+    return compile_query(GEO_BINS, spec, cell=cell)
+
+
+# =====================================================
+# Every page query, by name
+# =====================================================
+
+def page_queries(start_date=DEFAULT_START_DATE, end_date=DEFAULT_END_DATE, cell=0.02, violation_type="All", **summary_filters):
+    """
+    {name: CompiledQuery} for every query the pages run with the given
+    filters (summary_filters go to summary_filter); used by the benchmark
+    suite and explain_check.py
+    """
+    temporal = temporal_filter(start_date, end_date, violation_type)
+    summary = summary_filter(start_date, end_date, violation_type=violation_type, **summary_filters)
+
+    queries = {
+        "demographics.race_totals": CompiledQuery(RACE_TOTALS, {}),
+        "demographics.gender_totals": CompiledQuery(GENDER_TOTALS, {}),
+        "demographics.search_rate_by_race": CompiledQuery(SEARCH_RATE_BY_RACE, {}),
+        "vehicle.type_totals": CompiledQuery(VEHICLE_TYPE_TOTALS, {}),
+        "vehicle.make_totals": CompiledQuery(MAKE_TOTALS, {}),
+        "vehicle.make_model_totals": CompiledQuery(MAKE_MODEL_TOTALS, {}),
+        "temporal.monthly_trend": monthly_trend_query(temporal),
+        "temporal.hour_weekday": hour_weekday_query(temporal),
+        "summary.kpis": summary_kpis_query(summary),
+        "summary.state_ranking": state_ranking_query(summary),
+        "summary.rows": summary_rows_query(summary),
+        "summary.geo_bins": geo_bins_query(summary, cell),
+    }
+    for name in LIST_FILTERS:
+        queries[f"summary.filter_values.{name}"] = filter_values_query(name)
+    return queries
@@ -1,9 +1,22 @@
-import pandas as pd
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
 # from sqlalchemy import create_engine
-from sqlalchemy import text
 from preprocess import preprocess_chunk
 
-from db_utils import apply_schema_get_engine, get_engine
+from checkpoint import IngestCheckpoint
+from csv_reader import read_pipeline_chunks
+from db_utils import apply_schema_get_engine, get_engine, invalidate_query_cache, DB_NAME
+from dimensions import encode_dimensions
+from instrumentation import PROFILERS, FunctionProfiler, RunReport, peak_rss_mib, reset_peak_rss, timed
+from loaders import DEFAULT_LOADER, LOADERS, get_loader, insert_ignore
+from parquet_sink import ParquetSink
+from partitions import ensure_year_partitions
+from rollups import refresh_rollups, touched_months
 
 # =====================================================
 # Configuration
@@ -13,73 +26,294 @@ CSV_PATH = "Traffic_Violations.csv"
 CHUNK_SIZE = 50_000
 
 
-PARQUET_BACKUP = "traffic_cleaned.parquet"  # optional
+# optional parquet backup: hive-partitioned by year/month of stop_datetime
+PARQUET_DATASET = "traffic_cleaned"  # set to None to disable
+
+# manifest of what has been loaded from CSV_PATH: lets a failed run resume
+# and later runs load only rows appended to the CSV (None disables)
+CHECKPOINT_FILE = "ingest_checkpoint.json"
+
+# run reports (JSON + CSV per run) and profiler output (None disables)
+REPORT_DIR = "reports"
+
+# parallel ingest: worker processes running preprocess_chunk and the
+# maximum number of chunks submitted but not yet written (bounds memory)
+PARALLEL_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+MAX_IN_FLIGHT_CHUNKS = 2 * PARALLEL_WORKERS
 
 # =====================================================
 # Pipeline
 # =====================================================
 
-import math
+def write_chunk(engine, clean_chunk, loader=insert_ignore, parquet_sink=None, touched=None, report=None):
+    """
+    writes one cleaned chunk to every sink (MySQL + parquet backup) and adds
+    the months it covers to `touched` (rollups are refreshed for those);
+    returns those months. Sink timings go to `report` when given.
+    """
+    months = touched_months(clean_chunk)
+
+    # ---- yearly partition for every year in the chunk ----
+    ensure_year_partitions(engine, months)
+
+    # ---- dimension keys in place of the text columns ----
+    with timed(report, "write.dimensions", len(clean_chunk)):
+        fact_chunk = encode_dimensions(engine, clean_chunk)
+
+    # ---- insert into MySQL ----
+    # duplicates are rejected by PRIMARY KEY (seq_id, charge, stop_year)
+    # clean_chunk.to_sql(
+    #     "traffic_violations",
+    #     con=engine,
+    #     if_exists="append",
+    #     index=False,
+    #     method="multi",
+    #     chunksize=10_000
+    # )
+    loader(engine, "traffic_violations", fact_chunk, report=report)
+
+    # ---- optional parquet backup ----
+    # appended as new row groups, never rewritten; keeps the values
+    if parquet_sink is not None:
+        with timed(report, "write.parquet", len(clean_chunk)):
+            parquet_sink.write(clean_chunk)
+
+    if touched is not None:
+        touched.update(months)
+    return months
+
+
+# =====================================================
+# Timed stages (recorded on an instrumentation.RunReport)
+# =====================================================
+
+def _timed_preprocess(raw_chunk, profiler=None):
+    """
+    runs in a worker process; returns the cleaned chunk, its cpu time, the
+    per-step timings and the peak RSS (MiB) while preprocessing it
+    """
+    reset_peak_rss()
+    timings = {}
+    start = time.perf_counter()
+    if profiler is None:
+        clean_chunk = preprocess_chunk(raw_chunk, timings)
+    else:
+        clean_chunk = profiler.call(preprocess_chunk, raw_chunk, timings)
+    return clean_chunk, time.perf_counter() - start, timings, peak_rss_mib()
+
+
+def _record_preprocess(report, chunk_no, rows, result):
+    _, seconds, timings, peak = result
+    report.record("preprocess", rows, seconds)
+    report.record_timings(timings, rows, "preprocess")
+    report.update_chunk(
+        chunk_no,
+        rows=rows,
+        preprocess_s=seconds,
+        peak_rss_mib=peak,
+        **{f"preprocess_{step}_s": t for step, t in timings.items()},
+    )
+
+
+def _timed_chunks(reader, report, checkpoint=None):
+    """
+    yields (chunk_no, raw_chunk) while recording CSV parse time, skipping
+    chunks the checkpoint says are already loaded
+    """
+    chunk_no = 0
+    while True:
+        start = time.perf_counter()
+        raw_chunk = next(reader, None)
+        if raw_chunk is None:
+            return
+        chunk_no += 1
+        seconds = time.perf_counter() - start
+        report.record("read", len(raw_chunk), seconds)
+        report.update_chunk(chunk_no, read_s=seconds)
+
+        if checkpoint is not None and checkpoint.is_loaded(chunk_no, raw_chunk):
+            print(f"[INFO] Skipping chunk {chunk_no} (already loaded)")
+            continue
+        yield chunk_no, raw_chunk
+
+
+def _write_and_checkpoint(engine, chunk_no, clean_chunk, loader, parquet_sink, touched, checkpoint, report):
+    start = time.perf_counter()
+    months = write_chunk(engine, clean_chunk, loader, parquet_sink, touched, report)
+    if checkpoint is not None:
+        checkpoint.mark_loaded(chunk_no, len(clean_chunk), clean_chunk.index[0], months)
+
+    seconds = time.perf_counter() - start
+    report.record("write", len(clean_chunk), seconds)
+    report.update_chunk(chunk_no, write_s=seconds)
+
+
+# =====================================================
+# Serial / parallel drivers
+# =====================================================
+
+def _run_serial(engine, reader, report, loader, parquet_sink, touched, checkpoint, profiler=None):
+    for chunk_no, raw_chunk in _timed_chunks(reader, report, checkpoint):
+        print(f"[INFO] Processing chunk {chunk_no}")
+
+        # ---- preprocess ----
+        result = _timed_preprocess(raw_chunk, profiler)
+        _record_preprocess(report, chunk_no, len(raw_chunk), result)
+
+        # ---- sinks ----
+        _write_and_checkpoint(engine, chunk_no, result[0], loader, parquet_sink, touched, checkpoint, report)
 
-def insert_ignore(engine, table_name, df, batch_size=5_000):
-    cols = ",".join(df.columns)
-    placeholders = ",".join([f":{col}" for col in df.columns])
 
-    sql = f"""
-    INSERT IGNORE INTO {table_name} ({cols})
-    VALUES ({placeholders})
+def _run_parallel(engine, reader, report, loader, parquet_sink, touched, checkpoint, workers, max_in_flight):
+    """
+    Preprocesses chunks in a process pool and hands them, in source order,
+    to a single writer thread through a bounded queue. At most
+    `max_in_flight` chunks are submitted-but-unwritten at any time.
     """
+    write_queue = queue.Queue(maxsize=max(1, max_in_flight // 2))
+    writer_error = []
 
-    # ---- convert NaN → None (CRITICAL FIX) ----
-    records = df.where(pd.notna(df), None).to_dict(orient="records")
+    def writer():
+        while True:
+            item = write_queue.get()
+            if item is None:
+                return
+            if writer_error:
+                continue  # drain so the producer never blocks
 
-    with engine.begin() as conn:
-        for i in range(0, len(records), batch_size):
-            batch = records[i : i + batch_size]
-            conn.execute(text(sql), batch)
+            chunk_no, clean_chunk = item
+            try:
+                _write_and_checkpoint(engine, chunk_no, clean_chunk, loader, parquet_sink, touched, checkpoint, report)
+                print(f"[INFO] Wrote chunk {chunk_no}")
+            except Exception as e:  # surfaced to the main thread below
+                writer_error.append(e)
 
+    writer_thread = threading.Thread(target=writer, name="pipeline-writer", daemon=True)
+    writer_thread.start()
 
+    pending = deque()
 
-def run_pipeline():
+    def hand_off_oldest():
+        chunk_no, rows, future = pending.popleft()
+        result = future.result()
+        _record_preprocess(report, chunk_no, rows, result)
+        write_queue.put((chunk_no, result[0]))
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunk_no, raw_chunk in _timed_chunks(reader, report, checkpoint):
+                if writer_error:
+                    break
+                print(f"[INFO] Processing chunk {chunk_no}")
+                pending.append((chunk_no, len(raw_chunk), pool.submit(_timed_preprocess, raw_chunk)))
+
+                if len(pending) + write_queue.qsize() >= max_in_flight:
+                    hand_off_oldest()
+
+            while pending and not writer_error:
+                hand_off_oldest()
+    finally:
+        write_queue.put(None)
+        writer_thread.join()
+
+    if writer_error:
+        raise writer_error[0]
+
+
+def run_pipeline(
+    parallel=False,
+    workers=PARALLEL_WORKERS,
+    max_in_flight=MAX_IN_FLIGHT_CHUNKS,
+    loader=DEFAULT_LOADER,
+    full_reload=False,
+    profile=None,
+):
     engine_server = get_engine()
     engine = apply_schema_get_engine(engine_server) # engine bound to specific database
 
-    first_write = True
-    
+    load = get_loader(loader)
+    if loader == "load_data":
+        engine = get_engine(DB_NAME, local_infile=True)
+
+    profiler = FunctionProfiler(profile) if profile else None
+    if profiler is not None and parallel:
+        print("[WARN] profiling runs preprocess_chunk in this process; ignoring --parallel")
+        parallel = False
+
     print("=" * 60)
     print(f"reading {CSV_PATH} file in chunks")
-    
-    for chunk_no, raw_chunk in enumerate(
-        pd.read_csv(CSV_PATH, chunksize=CHUNK_SIZE, low_memory=False),
-        start=1
-    ):
-        print(f"[INFO] Processing chunk {chunk_no}")
+    if parallel:
+        print(f"parallel mode: {workers} workers, {max_in_flight} chunks in flight")
+    print(f"loader: {loader}")
 
-        # ---- preprocess ----
-        clean_chunk = preprocess_chunk(raw_chunk)
-
-        # ---- insert into MySQL ----
-        # duplicates are rejected by PRIMARY KEY (seq_id, charge)
-        # clean_chunk.to_sql(
-        #     "traffic_violations",
-        #     con=engine,
-        #     if_exists="append",
-        #     index=False,
-        #     method="multi",
-        #     chunksize=10_000
-        # )
-        insert_ignore(engine, "traffic_violations", clean_chunk)
-
-
-        # ---- optional parquet backup ----
-        clean_chunk.to_parquet(
-            PARQUET_BACKUP,
-            engine="pyarrow",
-            compression="snappy",
-            # append=not first_write
-        )
-
-        first_write = False
+    report = RunReport("ingest", meta={
+        "csv_path": CSV_PATH,
+        "chunk_size": CHUNK_SIZE,
+        "loader": loader,
+        "parallel": parallel,
+        "workers": workers if parallel else 1,
+        "parquet": bool(PARQUET_DATASET),
+    })
+
+    # ---- what to read: whole file, rows appended since the last run, or
+    # the range of a run that failed part-way ----
+    checkpoint = None
+    byte_range, row_offset = None, 0
+    if CHECKPOINT_FILE:
+        checkpoint = IngestCheckpoint(CHECKPOINT_FILE, CSV_PATH, CHUNK_SIZE)
+        if full_reload:
+            checkpoint.reset()
+        start_byte, end_byte, row_offset = checkpoint.plan()
+        if end_byte is None:
+            print("[SUCCESS] No new rows in the source CSV since the last load.")
+            return
+        byte_range = (start_byte, end_byte)
+
+    # only the columns preprocess_chunk uses, parsed by pyarrow
+    reader = iter(read_pipeline_chunks(CSV_PATH, CHUNK_SIZE, byte_range, row_offset))
+
+    parquet_sink = ParquetSink(PARQUET_DATASET) if PARQUET_DATASET else None
+    touched = set()
+
+    try:
+        if parallel:
+            _run_parallel(engine, reader, report, load, parquet_sink, touched, checkpoint, workers, max_in_flight)
+        else:
+            _run_serial(engine, reader, report, load, parquet_sink, touched, checkpoint, profiler)
+    finally:
+        if parquet_sink is not None:
+            parquet_sink.close()
+
+    # ---- parquet: one row per (seq_id, charge) in the partitions appended to ----
+    if parquet_sink is not None:
+        with report.timer("parquet.compact"):
+            dropped = parquet_sink.compact()
+        print(f"[INFO] Parquet partitions compacted, {dropped:,} duplicate rows dropped")
+
+    # months loaded by an earlier, interrupted attempt still need rollups
+    if checkpoint is not None:
+        touched |= checkpoint.loaded_months()
+
+    # ---- rollup tables for the dashboard ----
+    # only the months this load touched are recomputed
+    start = time.perf_counter()
+    with report.timer("rollups"):
+        refresh_rollups(engine, touched)
+    print(f"[INFO] Rollups refreshed for {len(touched)} month(s) in {time.perf_counter() - start:.2f}s")
+
+    # ---- dashboards drop their cached query results ----
+    invalidate_query_cache()
+
+    if checkpoint is not None:
+        checkpoint.complete()
+
+    # ---- run report / profile ----
+    report.print_summary()
+    if REPORT_DIR:
+        print(f"[INFO] Run report written to {report.write(REPORT_DIR)}")
+    if profiler is not None:
+        profile_path = os.path.join(REPORT_DIR or ".", f"preprocess-{report.started_at:%Y%m%d-%H%M%S}")
+        print(f"[INFO] Profile written to {profiler.save(profile_path)}")
 
     print("[SUCCESS] Data pipeline completed successfully.")
 
@@ -88,4 +322,22 @@ def run_pipeline():
 # =====================================================
 
 if __name__ == "__main__":
-    run_pipeline()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Traffic violations ingest pipeline")
+    parser.add_argument("--parallel", action="store_true", help="preprocess chunks in a process pool")
+    parser.add_argument("--workers", type=int, default=PARALLEL_WORKERS)
+    parser.add_argument("--max-in-flight", type=int, default=MAX_IN_FLIGHT_CHUNKS)
+    parser.add_argument("--loader", choices=sorted(LOADERS), default=DEFAULT_LOADER)
+    parser.add_argument("--full", action="store_true", help="ignore the checkpoint and reload the whole CSV")
+    parser.add_argument("--profile", choices=PROFILERS, help="profile preprocess_chunk (runs serially)")
+    args = parser.parse_args()
+
+    run_pipeline(
+        parallel=args.parallel,
+        workers=args.workers,
+        max_in_flight=args.max_in_flight,
+        loader=args.loader,
+        full_reload=args.full,
+        profile=args.profile,
+    )
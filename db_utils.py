@@ -1,5 +1,14 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+import pandas as pd
 from sqlalchemy import create_engine, text, inspect
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import QueuePool
 
 SCHEMA_FILE = "schema.sql"
 HOST_ID = "localhost"
@@ -7,18 +16,123 @@ USER_NAME = "root"
 USER_PASSWORD = "root"
 
 DB_NAME = "traffic_db"
+TABLE_NAME = "traffic_violations"  # the fact table schema.sql creates
+
+# where the dashboard pages run their queries:
+#   "mysql"  → traffic_db on the MySQL server above
+#   "duckdb" → embedded DuckDB over the cleaned parquet dataset (offline,
+#              needs the optional duckdb + duckdb-engine packages)
+ANALYTICS_BACKEND = "mysql"
+
+# connection pool, shared by everything in the process using the same URL
+POOL_SIZE = 5            # connections kept open
+POOL_MAX_OVERFLOW = 10   # extra connections allowed under load
+POOL_TIMEOUT = 30        # seconds to wait for a free connection
+POOL_RECYCLE = 3600      # seconds before a connection is replaced
+
+# query result cache shared by all dashboard pages
+QUERY_CACHE_TTL = 600          # seconds
+QUERY_CACHE_MAXSIZE = 256      # cached results (LRU beyond that)
+# touched by the pipeline after a load; every process holding a cache
+# clears it when the file's mtime changes
+QUERY_CACHE_EPOCH_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".query_cache_epoch")
+
+# threads running a page's independent queries at once (run_queries); kept
+# at the pool size so concurrent pages queue here rather than on the pool
+QUERY_WORKERS = POOL_SIZE
+
+# =====================================================
+# Engine registry
+# =====================================================
+
+_engines = {}                # (url, local_infile) → Engine
+_engines_lock = threading.Lock()
+_pool_waits = {}             # url → {"checkouts", "wait_total", "wait_max"}
+
 
-def get_engine(bound=""):
-    """return enigne bound to server if bound is empty string else the database provided"""
+def get_engine(bound="", local_infile=False):
+    """return enigne bound to server if bound is empty string else the database provided
+
+    One engine (and so one connection pool) is created per URL per process
+    and reused by every later call, e.g. on each Streamlit rerun.
+    local_infile=True allows LOAD DATA LOCAL INFILE (used by the load_data loader)
+    """
 
     server_url = f"mysql+mysqlconnector://{USER_NAME}:{USER_PASSWORD}@{HOST_ID}/{bound}"
+    key = (server_url, local_infile)
+
+    with _engines_lock:
+        if key in _engines:
+            return _engines[key]
+
+        connect_args = {"allow_local_infile": True} if local_infile else {}
+
+        try:
+            server_engine = create_engine(
+                server_url,
+                pool_pre_ping=True,
+                pool_size=POOL_SIZE,
+                max_overflow=POOL_MAX_OVERFLOW,
+                pool_timeout=POOL_TIMEOUT,
+                pool_recycle=POOL_RECYCLE,
+                connect_args=connect_args,
+            )
+        except SQLAlchemyError as e:
+            print(f"Error occured during engine creation: {e}")
+        else:
+            _engines[key] = server_engine
+            return server_engine
 
-    try:
-        server_engine = create_engine(server_url, pool_pre_ping=True, pool_recycle=3600)
-    except SQLAlchemyError as e:
-        print(f"Error occured during engine creation: {e}")
-    else:
-        return server_engine
+
+def get_analytics_engine():
+    """engine for dashboard queries, chosen by ANALYTICS_BACKEND"""
+    if ANALYTICS_BACKEND == "mysql":
+        return get_engine(DB_NAME)
+
+    if ANALYTICS_BACKEND == "duckdb":
+        from duckdb_backend import PARQUET_DATASET, create_duckdb_engine
+
+        key = ("duckdb", PARQUET_DATASET)
+        with _engines_lock:
+            if key not in _engines:
+                _engines[key] = create_duckdb_engine(PARQUET_DATASET, pool_size=POOL_SIZE)
+            return _engines[key]
+
+    raise ValueError(f"unknown ANALYTICS_BACKEND '{ANALYTICS_BACKEND}', expected 'mysql' or 'duckdb'")
+
+
+def _record_wait(engine, seconds):
+    url = engine.url.render_as_string(hide_password=True)
+    with _engines_lock:
+        waits = _pool_waits.setdefault(url, {"checkouts": 0, "wait_total": 0.0, "wait_max": 0.0})
+        waits["checkouts"] += 1
+        waits["wait_total"] += seconds
+        waits["wait_max"] = max(waits["wait_max"], seconds)
+
+
+def pool_stats():
+    """per-engine pool usage: size, checked-out / idle connections, overflow and checkout wait"""
+    with _engines_lock:
+        engines = list(_engines.values())
+        waits = {url: dict(w) for url, w in _pool_waits.items()}
+
+    stats = []
+    for engine in engines:
+        url = engine.url.render_as_string(hide_password=True)
+        pool = engine.pool
+        queue_pool = isinstance(pool, QueuePool)
+        wait = waits.get(url, {"checkouts": 0, "wait_total": 0.0, "wait_max": 0.0})
+        stats.append({
+            "url": url,
+            "pool_size": pool.size() if queue_pool else None,
+            "checked_out": pool.checkedout() if queue_pool else None,
+            "checked_in": pool.checkedin() if queue_pool else None,
+            "overflow": pool.overflow() if queue_pool else None,
+            "checkouts": wait["checkouts"],
+            "wait_avg_ms": 1000 * wait["wait_total"] / wait["checkouts"] if wait["checkouts"] else 0.0,
+            "wait_max_ms": 1000 * wait["wait_max"],
+        })
+    return stats
 
 def apply_schema_get_engine(engine):
     """checks for existing schema else apply schema and return engine bound to the database"""
@@ -40,6 +154,8 @@ def apply_schema_get_engine(engine):
             print(f"ERROR: Schema file '{SCHEMA_FILE}' not found.")
 
         else:
+            # comment lines are dropped first: a ';' in a comment would cut a statement
+            sql_content = "\n".join(line for line in sql_content.splitlines() if not line.lstrip().startswith("--"))
             statements = [stmt.strip() for stmt in sql_content.split(";") if stmt.strip()]
             print("=" * 60)
             with engine.connect() as conn:
@@ -63,9 +179,12 @@ def apply_schema_get_engine(engine):
     engine = get_engine(bound=f"{DB_NAME}")
     inspector = inspect(engine)
 
-    table_name = inspector.get_table_names()[0]
-    print(f"Describe table {table_name}")
-    columns = inspector.get_columns(table_name)
+    # the database also holds dim_* and rollup_* tables: look for the fact table by name
+    if not inspector.has_table(TABLE_NAME):
+        print(f"ERROR: {TABLE_NAME} not found in {DB_NAME}")
+        return
+    print(f"Describe table {TABLE_NAME}")
+    columns = inspector.get_columns(TABLE_NAME)
     pad = 30
     print(f"{'Name':<{pad}} {'Type':<{pad}} {'Nullable':<{pad}}")
     for col in columns:
@@ -74,3 +193,168 @@ def apply_schema_get_engine(engine):
     print("=" * 60)
     print(f"returning server engine bound to {DB_NAME}")
     return engine
+
+
+# =====================================================
+# Query result cache
+# =====================================================
+
+_query_cache = OrderedDict()   # key → (expires_at, DataFrame), LRU order
+_query_cache_lock = threading.Lock()
+_query_cache_stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+_query_cache_epoch = None
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = sorted(value, key=repr) if isinstance(value, (set, frozenset)) else value
+        return tuple(_freeze(v) for v in items)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def query_cache_key(sql, params=None, engine=None, key=None):
+    """
+    canonical key: whitespace-normalized SQL + sorted bound parameters +
+    database; a precomputed `key` (filters.compile_query) replaces the first two
+    """
+    target = engine.url.render_as_string(hide_password=True) if engine is not None else ANALYTICS_BACKEND
+    if key is not None:
+        return target, key
+    normalized_sql = " ".join(str(sql).split())
+    frozen_params = tuple(sorted((k, _freeze(v)) for k, v in (params or {}).items()))
+    return target, normalized_sql, frozen_params
+
+
+def _epoch():
+    try:
+        return os.stat(QUERY_CACHE_EPOCH_FILE).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _clear_if_new_load():
+    """drops cached results once the pipeline has finished a load"""
+    global _query_cache_epoch
+    epoch = _epoch()
+    if epoch != _query_cache_epoch:
+        if _query_cache_epoch is not None or _query_cache:
+            _query_cache.clear()
+            _query_cache_stats["invalidations"] += 1
+        _query_cache_epoch = epoch
+
+
+def run_query(sql, params=None, engine=None, ttl=None, key=None):
+    """
+    pd.read_sql through the shared result cache. `sql` is a string or a
+    text() statement; `engine` defaults to the analytics backend engine;
+    `key` is the query's cache key when it has one (CompiledQuery.key).
+    Results are returned as copies so pages may modify them.
+    """
+    ttl = QUERY_CACHE_TTL if ttl is None else ttl
+    engine = engine if engine is not None else get_analytics_engine()
+    key = query_cache_key(sql, params, engine, key)
+    now = time.monotonic()
+
+    with _query_cache_lock:
+        _clear_if_new_load()
+
+        entry = _query_cache.get(key)
+        if entry is not None:
+            expires_at, df = entry
+            if expires_at > now:
+                _query_cache.move_to_end(key)
+                _query_cache_stats["hits"] += 1
+                return df.copy()
+            del _query_cache[key]
+            _query_cache_stats["expirations"] += 1
+
+        _query_cache_stats["misses"] += 1
+
+    statement = text(sql) if isinstance(sql, str) else sql
+
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        _record_wait(engine, time.perf_counter() - started)
+        df = pd.read_sql(statement, conn, params=params)
+
+    with _query_cache_lock:
+        _query_cache[key] = (now + ttl, df)
+        _query_cache.move_to_end(key)
+        while len(_query_cache) > QUERY_CACHE_MAXSIZE:
+            _query_cache.popitem(last=False)
+            _query_cache_stats["evictions"] += 1
+
+    return df.copy()
+
+
+# =====================================================
+# Concurrent page queries
+# =====================================================
+
+_query_executor = None
+_query_executor_lock = threading.Lock()
+
+
+def _get_query_executor():
+    global _query_executor
+    with _query_executor_lock:
+        if _query_executor is None:
+            _query_executor = ThreadPoolExecutor(max_workers=QUERY_WORKERS, thread_name_prefix="dashboard-query")
+        return _query_executor
+
+
+def run_queries(queries, engine=None, ttl=None):
+    """
+    Runs a page's independent queries concurrently through run_query (so
+    each one is cached as usual) and returns {name: DataFrame}.
+
+    `queries` maps a name to `sql`, `(sql, params)` or a CompiledQuery
+    (statement, params, key). Each query checks
+    out its own pooled connection, so a page takes about as long as its
+    slowest query. If any query fails, the first error (in `queries`
+    order) is raised once all of them have finished.
+    """
+    items = {
+        name: (tuple(query) + (None,))[:3] if isinstance(query, tuple) else (query, None, None)
+        for name, query in queries.items()
+    }
+    if len(items) <= 1:
+        return {name: run_query(sql, params, engine, ttl, key) for name, (sql, params, key) in items.items()}
+
+    executor = _get_query_executor()
+    futures = {
+        name: executor.submit(run_query, sql, params, engine, ttl, key)
+        for name, (sql, params, key) in items.items()
+    }
+
+    results, error = {}, None
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            error = error or e
+    if error is not None:
+        raise error
+    return results
+
+
+def invalidate_query_cache():
+    """clears this process's cache and signals every other process to do the same"""
+    with _query_cache_lock:
+        _query_cache.clear()
+        _query_cache_stats["invalidations"] += 1
+
+    with open(QUERY_CACHE_EPOCH_FILE, "w", encoding="utf-8") as f:
+        f.write(str(time.time_ns()))
+
+
+def query_cache_stats():
+    with _query_cache_lock:
+        stats = dict(_query_cache_stats)
+        stats["size"] = len(_query_cache)
+
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    return stats
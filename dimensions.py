@@ -0,0 +1,156 @@
+import threading
+
+import pandas as pd
+from sqlalchemy import bindparam, text
+
+from loaders import _insert_ignore_verb
+
+# =====================================================
+# Dimension tables (star schema)
+# =====================================================
+# The low-cardinality text columns of traffic_violations are stored as
+# small integer keys (<column>_id) into dimension tables
+#
+#     dim_<name> (id, value)
+#
+# so the fact table, its indexes and the GROUP BYs over it work on 1-2 byte
+# integers instead of repeated VARCHARs. state and dl_state share dim_state.
+# The pipeline encodes every chunk before loading it (encode_dimensions);
+# new values are added to their dimension table on the way, and the
+# value → id mapping is cached in memory for the rest of the run.
+#
+# The fact table declares no foreign keys: partitioned InnoDB tables
+# cannot have them.
+
+# dimension table: (key type, value width)
+DIMENSIONS = {
+    "dim_violation_type": ("TINYINT UNSIGNED", 50),
+    "dim_agency": ("TINYINT UNSIGNED", 50),
+    "dim_subagency": ("TINYINT UNSIGNED", 100),
+    "dim_vehicle_type": ("TINYINT UNSIGNED", 50),
+    "dim_make": ("SMALLINT UNSIGNED", 50),
+    "dim_model": ("SMALLINT UNSIGNED", 50),
+    "dim_color": ("TINYINT UNSIGNED", 30),
+    "dim_race": ("TINYINT UNSIGNED", 50),
+    "dim_gender": ("TINYINT UNSIGNED", 10),
+    "dim_state": ("TINYINT UNSIGNED", 10),
+}
+
+# fact table column → its dimension table
+COLUMN_DIMENSIONS = {
+    "violation_type": "dim_violation_type",
+    "agency": "dim_agency",
+    "subagency": "dim_subagency",
+    "vehicle_type": "dim_vehicle_type",
+    "make": "dim_make",
+    "model": "dim_model",
+    "color": "dim_color",
+    "race": "dim_race",
+    "gender": "dim_gender",
+    "state": "dim_state",
+    "dl_state": "dim_state",
+}
+
+# key column in traffic_violations → value column of the cleaned chunks
+KEY_COLUMNS = {f"{column}_id": column for column in COLUMN_DIMENSIONS}
+
+# nullable integer dtype of the encoded key columns
+KEY_DTYPE = "Int32"
+
+# value → id per (database URL, dimension table); dimension tables only
+# grow, so cached keys stay valid
+_keys = {}
+_keys_lock = threading.Lock()
+_ready = set()
+
+
+def dimension_ddl(engine, table):
+    key_type, width = DIMENSIONS[table]
+    if engine.dialect.name == "sqlite":
+        # SQLite stand-in (benchmarks): INTEGER PRIMARY KEY is its auto-increment key
+        key, value = "id INTEGER PRIMARY KEY", f"value VARCHAR({width}) NOT NULL"
+    else:
+        # binary collation: values that differ only in case are different keys
+        key = f"id {key_type} NOT NULL AUTO_INCREMENT PRIMARY KEY"
+        value = f"value VARCHAR({width}) COLLATE utf8mb4_bin NOT NULL"
+    return f"CREATE TABLE IF NOT EXISTS {table} ({key}, {value}, UNIQUE (value))"
+
+
+def ensure_dimension_tables(engine):
+    with engine.begin() as conn:
+        for table in DIMENSIONS:
+            conn.execute(text(dimension_ddl(engine, table)))
+
+
+# =====================================================
+# Key lookup
+# =====================================================
+
+def _select_keys(conn, table, values=None):
+    if values is None:
+        rows = conn.execute(text(f"SELECT value, id FROM {table}"))
+    else:
+        query = text(f"SELECT value, id FROM {table} WHERE value IN :values").bindparams(
+            bindparam("values", expanding=True)
+        )
+        rows = conn.execute(query, {"values": list(values)})
+    return dict(rows.all())
+
+
+def dimension_keys(engine, table, values):
+    """
+    {value: id} covering `values`; values the table does not have yet are
+    inserted first. Only values missing from the table are inserted, so
+    AUTO_INCREMENT does not burn keys on duplicates.
+    """
+    url = str(engine.url)
+    with _keys_lock:
+        if url not in _ready:
+            ensure_dimension_tables(engine)
+            _ready.add(url)
+
+        if (url, table) not in _keys:
+            with engine.connect() as conn:
+                _keys[url, table] = _select_keys(conn, table)
+        keys = _keys[url, table]
+
+        missing = [v for v in values if v not in keys]
+        if missing:
+            with engine.begin() as conn:
+                conn.execute(
+                    text(f"{_insert_ignore_verb(engine)} INTO {table} (value) VALUES (:value)"),
+                    [{"value": v} for v in missing],
+                )
+                keys.update(_select_keys(conn, table, missing))
+
+            unresolved = [v for v in missing if v not in keys]
+            if unresolved:
+                raise ValueError(f"{table} did not store {unresolved[:5]} (collation or width)")
+        return keys
+
+
+def encode_dimensions(engine, df):
+    """
+    cleaned chunk → fact table layout: every dimension column is replaced
+    (in place) by its <column>_id key, NULL for missing values
+    """
+    columns = {}
+    for column in df.columns:
+        table = COLUMN_DIMENSIONS.get(column)
+        if table is None:
+            columns[column] = df[column]
+            continue
+        keys = dimension_keys(engine, table, df[column].dropna().unique())
+        columns[f"{column}_id"] = df[column].map(keys).astype(KEY_DTYPE)
+    return pd.DataFrame(columns, index=df.index)
+
+
+if __name__ == "__main__":
+    from db_utils import get_engine, DB_NAME
+
+    engine = get_engine(DB_NAME)
+    ensure_dimension_tables(engine)
+    with engine.connect() as conn:
+        for table in DIMENSIONS:
+            count = conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+            print(f"[STATS] {table:<20} {count:>8,} values")
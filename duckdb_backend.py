@@ -0,0 +1,138 @@
+import os
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import QueuePool
+
+from dimensions import COLUMN_DIMENSIONS, DIMENSIONS
+from rollups import FACT_TABLE, ROLLUPS
+
+# =====================================================
+# Embedded DuckDB backend over the parquet dataset
+# =====================================================
+# Exposes the cleaned parquet dataset (written by data_pipepline) under the
+# same table names the pages query in MySQL: traffic_violations and the
+# rollup_* tables as views, the dim_* tables built on connect. DuckDB scans
+# the parquet files directly, reads only the columns a query touches and
+# skips row groups by min/max stats, so no database server is needed.
+#
+# Needs the optional packages `duckdb` and `duckdb-engine`.
+
+PARQUET_DATASET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "traffic_cleaned")
+
+# the pipeline compacts the partitions it appends to (one row per
+# (seq_id, charge), see parquet_sink.compact_partition), so the views read
+# the files as they are. DEDUPE = True deduplicates on every query instead,
+# for datasets written before compaction (or run `python parquet_sink.py`
+# once): a window over the whole table, which costs a full scan and sort
+# per page query.
+DEDUPE = False
+
+# MySQL functions used by the page queries, in DuckDB terms
+MYSQL_COMPAT_MACROS = [
+    "CREATE OR REPLACE MACRO DATE_FORMAT(ts, fmt) AS strftime(ts, fmt)",
+    "CREATE OR REPLACE MACRO DATE(ts) AS CAST(ts AS DATE)",
+    # MySQL: 1 = Sunday … 7 = Saturday
+    "CREATE OR REPLACE MACRO DAYOFWEEK(ts) AS isodow(ts) % 7 + 1",
+]
+
+
+def _parquet_scan(dataset):
+    """single file (e.g. traffic_cleaned.parquet) or a ParquetSink directory"""
+    if os.path.isfile(dataset):
+        return f"read_parquet('{dataset}')"
+    return (
+        f"read_parquet('{dataset}/**/*.parquet', hive_partitioning = true, "
+        f"hive_types = {{'year': SMALLINT, 'month': TINYINT}})"
+    )
+
+
+# the generated columns of traffic_violations in schema.sql
+GENERATED_COLUMNS = {
+    "stop_date": "CAST(stop_datetime AS DATE)",
+    "stop_month": "CAST(date_trunc('month', stop_datetime) AS DATE)",
+    "stop_hour": "hour(stop_datetime)",
+    "stop_weekday": "isodow(stop_datetime) % 7 + 1",
+    "stop_year": "coalesce(year(stop_datetime), 0)",
+}
+
+
+# dimension keys (dimensions.py): the parquet files keep the values, so a
+# key is the hash of its value, and each dim_* table lists the distinct
+# values with their hashes. Equal values get equal keys, which is all the
+# page queries rely on.
+KEY_COLUMNS = {
+    f"{column}_id": f"CASE WHEN {column} IS NOT NULL THEN hash({column}) END"
+    for column in COLUMN_DIMENSIONS
+}
+
+
+def _fact_view_sql(dataset):
+    scan = _parquet_scan(dataset)
+    generated = ", ".join(
+        f"{expr} AS {name}" for name, expr in {**GENERATED_COLUMNS, **KEY_COLUMNS}.items()
+    )
+    if DEDUPE:
+        return f"""
+            CREATE OR REPLACE VIEW {FACT_TABLE} AS
+            SELECT *, {generated} FROM {scan}
+            QUALIFY row_number() OVER (PARTITION BY seq_id, charge) = 1
+        """
+    return f"CREATE OR REPLACE VIEW {FACT_TABLE} AS SELECT *, {generated} FROM {scan}"
+
+
+def _dimension_values_sql(dataset):
+    """the distinct values of every dimension column, in one scan of the dataset"""
+    scan = _parquet_scan(dataset)
+    columns = ", ".join(COLUMN_DIMENSIONS)
+    return f"""
+        CREATE OR REPLACE TEMP TABLE _dimension_values AS
+        SELECT DISTINCT column_name, value
+        FROM (UNPIVOT (SELECT {columns} FROM {scan}) ON {columns} INTO NAME column_name VALUE value)
+    """
+
+
+def _dimension_table_sql(table):
+    columns = ", ".join(f"'{column}'" for column, dimension in COLUMN_DIMENSIONS.items() if dimension == table)
+    return f"""
+        CREATE OR REPLACE TABLE {table} AS
+        SELECT DISTINCT hash(value) AS id, value FROM _dimension_values WHERE column_name IN ({columns})
+    """
+
+
+def setup_statements(dataset=PARQUET_DATASET):
+    statements = list(MYSQL_COMPAT_MACROS)
+    dataset = dataset.replace(os.sep, "/")
+    statements.append(_fact_view_sql(dataset))
+    # dim_* are small tables built once per connection: as views, every
+    # query joining one would rescan the dataset for its distinct values
+    statements.append(_dimension_values_sql(dataset))
+    statements += [_dimension_table_sql(table) for table in DIMENSIONS]
+    statements.append("DROP TABLE _dimension_values")
+
+    # rollups are plain views: the aggregation runs on the fly over parquet
+    for table, spec in ROLLUPS.items():
+        statements.append(
+            f"CREATE OR REPLACE VIEW {table} AS " + spec["select"].format(where="TRUE")
+        )
+    return statements
+
+
+def create_duckdb_engine(dataset=PARQUET_DATASET, pool_size=5):
+    """
+    SQLAlchemy engine over an in-memory DuckDB database. Every pooled
+    connection is its own in-memory database, so the macros and views are
+    created on connect.
+    """
+    if not os.path.exists(dataset):
+        raise FileNotFoundError(
+            f"parquet dataset '{dataset}' not found; run data_pipepline.py first"
+        )
+
+    engine = create_engine("duckdb:///:memory:", poolclass=QueuePool, pool_size=pool_size)
+
+    @event.listens_for(engine, "connect")
+    def _setup(dbapi_connection, connection_record):
+        for stmt in setup_statements(dataset):
+            dbapi_connection.execute(stmt)
+
+    return engine
@@ -0,0 +1,126 @@
+import sys
+from datetime import date
+
+from sqlalchemy import bindparam, text
+
+from dashboard_queries import LIST_FILTERS, page_queries
+from db_utils import get_engine, DB_NAME
+from dimensions import DIMENSIONS
+from rollups import FACT_TABLE, ROLLUPS
+
+# =====================================================
+# EXPLAIN check for the dashboard queries
+# =====================================================
+# Runs EXPLAIN for every page query (and every rollup refresh) against the
+# MySQL database, under the default filters and a few other filter shapes,
+# and exits non-zero when one of them reads traffic_violations with a full
+# table or full index scan, or when a single-year query is not pruned to
+# one partition. Run it against a loaded database: on an empty table the
+# optimizer has no reason to prefer an index.
+#
+#     python explain_check.py
+
+# EXPLAIN access types that read the whole table / index
+FULL_SCAN_TYPES = {"ALL", "index"}
+
+# rollup and dimension tables are small; reading them whole is what they
+# are for
+SCAN_ALLOWED = set(ROLLUPS) | set(DIMENSIONS)
+
+# filter shapes whose fact-table reads must touch a single partition
+SINGLE_PARTITION_SHAPES = {"one_year", "refresh"}
+
+
+def _sample_values(conn):
+    """one existing value per IN-list filter, so the filtered shapes are realistic"""
+    values = {}
+    for name in LIST_FILTERS:
+        value = conn.execute(
+            text("SELECT value FROM rollup_filter_values WHERE dimension = :name LIMIT 1"), {"name": name}
+        ).scalar()
+        if value is not None:
+            values[name] = [value]
+    return values
+
+
+def filter_shapes(sample_values):
+    """{shape name: page_queries kwargs} checked on top of the defaults"""
+    shapes = {"defaults": {}}
+    for name, values in sample_values.items():
+        shapes[name] = {name: values}
+    shapes["violation_type"] = {"violation_type": "CITATION"}
+    shapes["one_year"] = {"start_date": date(2023, 1, 1), "end_date": date(2023, 12, 31)}
+    return shapes
+
+
+def rollup_refresh_queries(start=date(2023, 1, 1), end=date(2023, 2, 1)):
+    """the SELECT half of each rollup refresh, for one month"""
+    queries = {}
+    for table, spec in ROLLUPS.items():
+        bucket = spec["bucket"]
+        where = f"{bucket} >= :start AND {bucket} < :end"
+        queries[f"rollup_refresh.{table}"] = (text(spec["select"].format(where=where)), {"start": start, "end": end})
+    return queries
+
+
+def explain(conn, statement, params):
+    """EXPLAIN rows as dicts; list params are re-bound as expanding IN lists"""
+    binds = [bindparam(name, expanding=True) for name, value in params.items() if isinstance(value, list)]
+    query = text("EXPLAIN " + statement.text)
+    if binds:
+        query = query.bindparams(*binds)
+    return [dict(row) for row in conn.execute(query, params).mappings()]
+
+
+def plan_problems(plan, single_partition=False):
+    """full scans of traffic_violations (and unpruned reads of it) in an EXPLAIN plan"""
+    problems = []
+    for row in plan:
+        table = row.get("table")
+        # <derived2>, <subquery3>, <union1,2>: results of the query's own
+        # subqueries, already small
+        if str(table).startswith("<"):
+            continue
+        if row.get("type") in FULL_SCAN_TYPES and table not in SCAN_ALLOWED:
+            problems.append(f"full scan ({row['type']}) of {table}, possible keys: {row.get('possible_keys')}")
+        partitions = row.get("partitions") or ""
+        if single_partition and table == FACT_TABLE and "," in partitions:
+            problems.append(f"{table} not pruned to one partition: {partitions}")
+    return problems
+
+
+def check_queries(engine):
+    """EXPLAINs every query under every shape; returns [(shape, name, problem), ...]"""
+    failures = []
+    with engine.connect() as conn:
+        shapes = filter_shapes(_sample_values(conn))
+
+        checks = [("refresh", rollup_refresh_queries())]
+        checks += [(shape, page_queries(**kwargs)) for shape, kwargs in shapes.items()]
+
+        for shape, queries in checks:
+            for name, query in queries.items():
+                plan = explain(conn, query[0], query[1])
+                for row in plan:
+                    print(
+                        f"[INFO] {shape + '/' + name:<50} {str(row.get('table')):<24} "
+                        f"{str(row.get('type')):<8} key={row.get('key')} partitions={row.get('partitions')}"
+                    )
+                problems = plan_problems(plan, single_partition=shape in SINGLE_PARTITION_SHAPES)
+                failures += [(shape, name, problem) for problem in problems]
+    return failures
+
+
+if __name__ == "__main__":
+    engine = get_engine(DB_NAME)
+    if engine.dialect.name != "mysql":
+        sys.exit(f"explain_check needs the MySQL database, got {engine.dialect.name}")
+
+    failures = check_queries(engine)
+    print("=" * 60)
+    if failures:
+        for shape, name, problem in failures:
+            print(f"[WARN] {shape}/{name}: {problem}")
+        sys.exit(1)
+
+    print("[SUCCESS] every page query reads traffic_violations through an index (and prunes partitions)")
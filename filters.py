@@ -0,0 +1,203 @@
+import re
+from functools import lru_cache
+from typing import Any, NamedTuple, Optional, Tuple
+
+from sqlalchemy import bindparam, text
+
+from db_utils import _freeze
+
+# =====================================================
+# Filter spec → parameterized statement
+# =====================================================
+# A page describes its filters as a tuple of typed filters:
+#
+#     spec = (
+#         DateRange("stop_datetime", start, end, year_column="stop_year"),
+#         AnyOf("charge", ["21-801.1"]),
+#         InDimension("state", "dim_state", ["MD", "VA"]),
+#         Equals("violation_type", None),      # None = filter not applied
+#     )
+#
+# and compiles a query template ("... WHERE {where} ...") with it. Filters
+# that are not applied drop out, so the statement only depends on the
+# filter *shape* (which filters are active), never on the values: the
+# text() statement (with its expanding IN bindparams) is built once per
+# (template, shape) and reused, the SQL string stays stable for the
+# driver, and the result cache gets a canonical key.
+
+STATEMENT_CACHE_SIZE = 512
+
+
+class DateRange(NamedTuple):
+    """column BETWEEN start AND end; with year_column, also the years (partition pruning)"""
+    column: str
+    start: Any
+    end: Any
+    year_column: Optional[str] = None
+
+    def active(self):
+        return self.start is not None and self.end is not None
+
+    def shape(self):
+        return self._replace(start=None, end=None)
+
+    def clause(self):
+        sql = f"{self.column} BETWEEN :{self.column}_start AND :{self.column}_end"
+        if self.year_column:
+            sql += f" AND {self.year_column} BETWEEN :{self.column}_start_year AND :{self.column}_end_year"
+        return sql, ()
+
+    def params(self):
+        params = {f"{self.column}_start": self.start, f"{self.column}_end": self.end}
+        if self.year_column:
+            params[f"{self.column}_start_year"] = self.start.year
+            params[f"{self.column}_end_year"] = self.end.year
+        return params
+
+
+class AnyOf(NamedTuple):
+    """column IN (...values), bound as an expanding list; no values = not applied"""
+    column: str
+    values: Tuple = ()
+
+    def active(self):
+        return len(self.values) > 0
+
+    def shape(self):
+        return self._replace(values=())
+
+    def clause(self):
+        return f"{self.column} IN :{self.column}", (self.column,)
+
+    def params(self):
+        # sorted: the same selection in any order is the same query
+        return {self.column: sorted(self.values, key=repr)}
+
+
+class InDimension(NamedTuple):
+    """
+    the column's dimension key (<column>_id, see dimensions.py) is one of
+    the keys of `values` in `table`; no values = not applied
+    """
+    column: str
+    table: str
+    values: Tuple = ()
+
+    def active(self):
+        return len(self.values) > 0
+
+    def shape(self):
+        return self._replace(values=())
+
+    def clause(self):
+        return f"{self.column}_id IN (SELECT id FROM {self.table} WHERE value IN :{self.column})", (self.column,)
+
+    def params(self):
+        return {self.column: sorted(self.values, key=repr)}
+
+
+class Equals(NamedTuple):
+    """column = value; None = not applied"""
+    column: str
+    value: Any = None
+
+    def active(self):
+        return self.value is not None
+
+    def shape(self):
+        return self._replace(value=None)
+
+    def clause(self):
+        return f"{self.column} = :{self.column}", ()
+
+    def params(self):
+        return {self.column: self.value}
+
+
+class Prefix(NamedTuple):
+    """
+    column starts with prefix, ignoring case on every backend (MySQL's
+    default collation ignores it, DuckDB's LIKE does not); "" = not applied
+    """
+    column: str
+    prefix: str = ""
+
+    def active(self):
+        return bool(self.prefix)
+
+    def shape(self):
+        return self._replace(prefix="")
+
+    def clause(self):
+        return f"LOWER({self.column}) LIKE :{self.column}_prefix ESCAPE '!'", ()
+
+    def params(self):
+        # the prefix is matched literally: its wildcards are escaped
+        return {f"{self.column}_prefix": re.sub(r"([!%_])", r"!\1", self.prefix.lower()) + "%"}
+
+
+class NotNull(NamedTuple):
+    column: str
+
+    def active(self):
+        return True
+
+    def shape(self):
+        return self
+
+    def clause(self):
+        return f"{self.column} IS NOT NULL", ()
+
+    def params(self):
+        return {}
+
+
+class CompiledQuery(NamedTuple):
+    """a statement with its params and a canonical result-cache key"""
+    statement: Any
+    params: dict
+    key: Optional[tuple] = None
+
+
+# =====================================================
+# Compilation
+# =====================================================
+
+def filter_shape(spec):
+    """the active filters with their values stripped — all the statement depends on"""
+    return tuple(f.shape() for f in spec if f.active())
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def _compile(template, shape):
+    clauses, expanding = [], []
+    for f in shape:
+        sql, lists = f.clause()
+        clauses.append(sql)
+        expanding += lists
+
+    statement = text(template.format(where=" AND ".join(clauses) or "TRUE"))
+    if expanding:
+        statement = statement.bindparams(*(bindparam(name, expanding=True) for name in expanding))
+    return statement
+
+
+def compile_query(template, spec, **extra_params):
+    """
+    (statement, params, key) for `template` with the active filters of
+    `spec`; extra_params are the template's own placeholders (not filters)
+    """
+    shape = filter_shape(spec)
+    params = {}
+    for f in spec:
+        if f.active():
+            params.update(f.params())
+    params.update(extra_params)
+
+    key = (template, shape, tuple(sorted((k, _freeze(v)) for k, v in params.items())))
+    return CompiledQuery(_compile(template, shape), params, key)
+
+
+def statement_cache_info():
+    return _compile.cache_info()
+
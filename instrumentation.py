@@ -0,0 +1,324 @@
+import bisect
+import contextlib
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+# =====================================================
+# Run instrumentation for the ingest pipeline
+# =====================================================
+# RunReport collects, thread-safely:
+#   - stage totals (rows, busy seconds, calls) for "read", "preprocess",
+#     "write" and their sub-stages ("preprocess.datetime", "write.db", ...)
+#   - one row per chunk (timings, peak RSS)
+#   - DB round-trip latencies, bucketed into a histogram
+# and writes them as <name>-<timestamp>.json plus -stages.csv / -chunks.csv
+# so runs can be compared release to release.
+
+# upper bounds (ms) of the DB batch latency histogram buckets; the last
+# bucket counts everything slower
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1_000, 2_500, 5_000, 10_000]
+
+
+# =====================================================
+# Memory
+# =====================================================
+
+def status_kb(field):
+    """a kB field of /proc/self/status (VmRSS, VmHWM, ...); None off Linux"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss():
+    """starts a new peak-RSS window (Linux only; elsewhere the peak is process-wide)"""
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mib():
+    """peak resident memory of this process since the last reset, in MiB; None where unknown (Windows)"""
+    if sys.platform.startswith("linux"):
+        peak_kb = status_kb("VmHWM")
+        if peak_kb is not None:
+            return peak_kb / 1024
+    try:
+        import resource  # Unix only
+    except ImportError:
+        return None
+    scale = 1 / 1024 if sys.platform.startswith("linux") else 1 / 2**20  # macOS reports bytes
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+# =====================================================
+# Timers
+# =====================================================
+
+class StageClock:
+    """
+    Accumulates the time between consecutive lap() calls into `timings`
+    (stage → seconds). Does nothing when `timings` is None.
+    """
+
+    def __init__(self, timings):
+        self.timings = timings
+        self._last = time.perf_counter()
+
+    def lap(self, stage):
+        if self.timings is None:
+            return
+        now = time.perf_counter()
+        self.timings[stage] = self.timings.get(stage, 0.0) + (now - self._last)
+        self._last = now
+
+
+def timed(report, stage, rows=0):
+    """context manager recording a stage on `report` (no-op for None)"""
+    if report is None:
+        return contextlib.nullcontext()
+    return report.timer(stage, rows)
+
+
+def timed_db_batch(report, rows):
+    """context manager recording one DB round trip on `report` (no-op for None)"""
+    if report is None:
+        return contextlib.nullcontext()
+    return report.db_batch_timer(rows)
+
+
+# =====================================================
+# Report
+# =====================================================
+
+class RunReport:
+    def __init__(self, name="ingest", meta=None):
+        self.name = name
+        self.meta = dict(meta or {})
+        self.started_at = datetime.now()
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+
+        self.stages = {}   # stage → {"rows", "seconds", "calls"}
+        self.chunks = {}   # chunk_no → {field: value}
+        self._latencies_ms = []
+        self._batch_rows = 0
+
+    # ---- recording ----
+    def record(self, stage, rows, seconds):
+        with self._lock:
+            s = self.stages.setdefault(stage, {"rows": 0, "seconds": 0.0, "calls": 0})
+            s["rows"] += rows
+            s["seconds"] += seconds
+            s["calls"] += 1
+
+    def record_timings(self, timings, rows, prefix):
+        """sub-stage timings from StageClock, e.g. prefix "preprocess" """
+        for stage, seconds in timings.items():
+            self.record(f"{prefix}.{stage}", rows, seconds)
+
+    def record_db_batch(self, rows, seconds):
+        with self._lock:
+            self._latencies_ms.append(seconds * 1000)
+            self._batch_rows += rows
+
+    def update_chunk(self, chunk_no, **fields):
+        with self._lock:
+            self.chunks.setdefault(chunk_no, {"chunk": chunk_no}).update(fields)
+
+    @contextlib.contextmanager
+    def timer(self, stage, rows=0):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, rows, time.perf_counter() - start)
+
+    @contextlib.contextmanager
+    def db_batch_timer(self, rows):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.record_db_batch(rows, seconds)
+            self.record("write.db", rows, seconds)
+
+    # ---- summaries ----
+    def db_latency(self):
+        with self._lock:
+            latencies = np.array(self._latencies_ms)
+            batch_rows = self._batch_rows
+
+        counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        for ms in latencies:
+            counts[bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+
+        labels = [f"<={b}ms" for b in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        summary = {"batches": len(latencies), "rows": batch_rows, "histogram": dict(zip(labels, counts))}
+        if len(latencies):
+            summary.update({
+                "mean_ms": float(latencies.mean()),
+                "p50_ms": float(np.percentile(latencies, 50)),
+                "p95_ms": float(np.percentile(latencies, 95)),
+                "p99_ms": float(np.percentile(latencies, 99)),
+                "max_ms": float(latencies.max()),
+            })
+        return summary
+
+    def stage_rows(self):
+        with self._lock:
+            stages = {stage: dict(s) for stage, s in self.stages.items()}
+
+        # each top-level stage followed by its sub-stages
+        parents = list(dict.fromkeys(stage.split(".")[0] for stage in stages))
+        stages = dict(sorted(stages.items(), key=lambda kv: (parents.index(kv[0].split(".")[0]), "." in kv[0])))
+        return [
+            {
+                "stage": stage,
+                **s,
+                "rows_per_sec": s["rows"] / s["seconds"] if s["seconds"] else 0.0,
+            }
+            for stage, s in stages.items()
+        ]
+
+    def to_dict(self):
+        with self._lock:
+            chunks = [dict(self.chunks[no]) for no in sorted(self.chunks)]
+
+        # per-chunk windows reset the peak, so the run peak is their max
+        peaks = [peak_rss_mib()] + [c.get("peak_rss_mib") for c in chunks]
+        peak = max((p for p in peaks if p is not None), default=None)
+
+        stages = self.stage_rows()
+        wall = time.perf_counter() - self._started
+        written = next((s["rows"] for s in stages if s["stage"] == "write"), 0)
+        return {
+            "name": self.name,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "wall_seconds": wall,
+            "rows": written,
+            "rows_per_sec": written / wall if wall else 0.0,
+            "peak_rss_mib": peak,
+            "meta": self.meta,
+            "stages": stages,
+            "db_latency": self.db_latency(),
+            "chunks": chunks,
+        }
+
+    # ---- output ----
+    def print_summary(self):
+        report = self.to_dict()
+
+        print("=" * 60)
+        for s in report["stages"]:
+            indent = "  " if "." in s["stage"] else ""
+            print(
+                f"[STATS] {indent + s['stage']:<26} {s['rows']:>10,} rows  "
+                f"{s['seconds']:>8.2f}s busy  {s['rows_per_sec']:>12,.0f} rows/sec"
+            )
+        print(
+            f"[STATS] {'end-to-end':<26} {report['rows']:>10,} rows  "
+            f"{report['wall_seconds']:>8.2f}s wall  {report['rows_per_sec']:>12,.0f} rows/sec"
+        )
+
+        db = report["db_latency"]
+        if db["batches"]:
+            print(
+                f"[STATS] db batches: {db['batches']:,}  p50 {db['p50_ms']:.1f} ms  "
+                f"p95 {db['p95_ms']:.1f} ms  max {db['max_ms']:.1f} ms"
+            )
+        if report["peak_rss_mib"] is not None:
+            print(f"[STATS] peak RSS: {report['peak_rss_mib']:,.0f} MiB")
+
+    def write(self, directory):
+        """writes the JSON report and the stage / chunk CSVs; returns the JSON path"""
+        os.makedirs(directory, exist_ok=True)
+        report = self.to_dict()
+        base = os.path.join(directory, f"{self.name}-{self.started_at:%Y%m%d-%H%M%S}")
+
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1, default=str)
+
+        _write_csv(base + "-stages.csv", report["stages"])
+        _write_csv(base + "-chunks.csv", report["chunks"])
+        return base + ".json"
+
+
+def _write_csv(path, rows):
+    if not rows:
+        return
+    fields = list(dict.fromkeys(key for row in rows for key in row))
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+# =====================================================
+# Optional profiler around a function
+# =====================================================
+
+PROFILERS = ("cprofile", "pyinstrument")
+
+
+class FunctionProfiler:
+    """
+    Profiles every call made through call() into one session and saves it:
+    cProfile → <path>.prof (+ top functions printed), pyinstrument →
+    <path>.html (+ text tree printed). pyinstrument is optional.
+    """
+
+    def __init__(self, kind="cprofile"):
+        if kind not in PROFILERS:
+            raise ValueError(f"unknown profiler '{kind}', expected one of {PROFILERS}")
+        self.kind = kind
+
+        if kind == "cprofile":
+            import cProfile
+            self._profiler = cProfile.Profile()
+        else:
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                raise RuntimeError("pyinstrument is not installed (pip install pyinstrument)") from None
+            self._profiler = Profiler()
+
+    def call(self, fn, *args, **kwargs):
+        if self.kind == "cprofile":
+            return self._profiler.runcall(fn, *args, **kwargs)
+
+        self._profiler.start()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._profiler.stop()
+
+    def save(self, path, top=15):
+        if self.kind == "cprofile":
+            import pstats
+            self._profiler.dump_stats(path + ".prof")
+            pstats.Stats(self._profiler).sort_stats("cumulative").print_stats(top)
+            return path + ".prof"
+
+        with open(path + ".html", "w", encoding="utf-8") as f:
+            f.write(self._profiler.output_html())
+        print(self._profiler.output_text())
+        return path + ".html"
@@ -0,0 +1,174 @@
+import csv
+import os
+import tempfile
+
+import pandas as pd
+from sqlalchemy import text
+
+from instrumentation import timed, timed_db_batch
+
+# =====================================================
+# Loader backends
+# =====================================================
+# Every loader has the same signature:
+#
+#     loader(engine, table_name, df, batch_size=5_000, report=None)
+#
+# and must keep the PRIMARY KEY (seq_id, charge) dedupe, i.e. rows that
+# already exist are silently skipped. SQLite engines are accepted as a
+# stand-in for MySQL (INSERT OR IGNORE instead of INSERT IGNORE).
+#
+# With an instrumentation.RunReport as `report`, loaders record their
+# client-side conversion as "write.convert" and every DB round trip as a
+# batch latency.
+
+STAGING_DIR = None  # None → system temp dir
+
+
+def _insert_ignore_verb(engine):
+    return "INSERT OR IGNORE" if engine.dialect.name == "sqlite" else "INSERT IGNORE"
+
+
+def _records_as_tuples(df):
+    """NaN / NaT → None, one plain tuple per row (no per-row dicts)"""
+    values = df.astype(object).where(df.notna(), None)
+    return list(values.itertuples(index=False, name=None))
+
+
+def insert_ignore(engine, table_name, df, batch_size=5_000, report=None):
+    """row-dict INSERT IGNORE through SQLAlchemy text(), the original loader"""
+    cols = ",".join(df.columns)
+    placeholders = ",".join([f":{col}" for col in df.columns])
+
+    sql = f"""
+    {_insert_ignore_verb(engine)} INTO {table_name} ({cols})
+    VALUES ({placeholders})
+    """
+
+    # ---- convert NaN / NaT → None (CRITICAL FIX) ----
+    # via object dtype: where(..., None) on a float column would give NaN back
+    with timed(report, "write.convert", len(df)):
+        records = df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+    with engine.begin() as conn:
+        for i in range(0, len(records), batch_size):
+            batch = records[i : i + batch_size]
+            with timed_db_batch(report, len(batch)):
+                conn.execute(text(sql), batch)
+
+
+def executemany_ignore(engine, table_name, df, batch_size=5_000, report=None):
+    """
+    Driver-level executemany over tuples. Skips SQLAlchemy parameter
+    processing entirely; mysql-connector rewrites the batch into a single
+    multi-row INSERT.
+    """
+    marker = "?" if engine.dialect.paramstyle == "qmark" else "%s"
+    cols = ",".join(df.columns)
+    placeholders = ",".join([marker] * len(df.columns))
+
+    sql = f"{_insert_ignore_verb(engine)} INTO {table_name} ({cols}) VALUES ({placeholders})"
+
+    with timed(report, "write.convert", len(df)):
+        rows = _records_as_tuples(df)
+
+    with engine.begin() as conn:
+        cursor = conn.connection.cursor()
+        try:
+            for i in range(0, len(rows), batch_size):
+                batch = rows[i : i + batch_size]
+                with timed_db_batch(report, len(batch)):
+                    cursor.executemany(sql, batch)
+        finally:
+            cursor.close()
+
+
+def _write_staging_file(df, path):
+    """
+    Writes a chunk in the format expected by the LOAD DATA statement below:
+    NULL as \\N, booleans as 0/1, backslashes escaped, MySQL DATETIME text.
+    """
+    staged = {}
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_bool_dtype(series):
+            series = series.astype("int8")
+        elif isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.cat.rename_categories(lambda c: c.replace("\\", "\\\\"))
+        elif pd.api.types.infer_dtype(series, skipna=True) == "string":
+            series = series.str.replace("\\", "\\\\", regex=False)
+        staged[col] = series
+
+    pd.DataFrame(staged).to_csv(
+        path,
+        index=False,
+        header=False,
+        na_rep="\\N",
+        date_format="%Y-%m-%d %H:%M:%S",
+        quoting=csv.QUOTE_MINIMAL,
+        lineterminator="\n",
+    )
+
+
+def load_data_infile(engine, table_name, df, batch_size=5_000, report=None):
+    """
+    Streams the chunk into a staging file, bulk loads it into a temporary
+    staging table with LOAD DATA LOCAL INFILE and merges it into the target
+    with INSERT IGNORE ... SELECT, which keeps the primary-key dedupe.
+
+    Needs `local_infile=ON` on the server and an engine created with
+    get_engine(..., local_infile=True). Non-MySQL engines fall back to
+    executemany_ignore.
+    """
+    if engine.dialect.name != "mysql":
+        return executemany_ignore(engine, table_name, df, batch_size, report)
+
+    staging_table = f"{table_name}_staging"
+    cols = ",".join(df.columns)
+
+    fd, path = tempfile.mkstemp(prefix=f"{table_name}_", suffix=".csv", dir=STAGING_DIR)
+    os.close(fd)
+
+    try:
+        with timed(report, "write.convert", len(df)):
+            _write_staging_file(df, path)
+
+        # the whole staging round trip counts as one batch
+        with engine.begin() as conn, timed_db_batch(report, len(df)):
+            # not LIKE: temporary tables cannot be partitioned
+            conn.execute(text(
+                f"CREATE TEMPORARY TABLE IF NOT EXISTS {staging_table} AS SELECT {cols} FROM {table_name} WHERE FALSE"
+            ))
+            conn.execute(text(f"DELETE FROM {staging_table}"))
+            conn.execute(
+                text(f"""
+                LOAD DATA LOCAL INFILE :path
+                IGNORE INTO TABLE {staging_table}
+                FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' ESCAPED BY '\\\\'
+                LINES TERMINATED BY '\\n'
+                ({cols})
+                """),
+                {"path": path.replace(os.sep, "/")},
+            )
+            conn.execute(text(f"""
+                INSERT IGNORE INTO {table_name} ({cols})
+                SELECT {cols} FROM {staging_table}
+            """))
+    finally:
+        os.remove(path)
+
+
+LOADERS = {
+    "insert": insert_ignore,
+    "executemany": executemany_ignore,
+    "load_data": load_data_infile,
+}
+
+DEFAULT_LOADER = "insert"
+
+
+def get_loader(name=DEFAULT_LOADER):
+    try:
+        return LOADERS[name]
+    except KeyError:
+        raise ValueError(f"unknown loader '{name}', expected one of {sorted(LOADERS)}") from None
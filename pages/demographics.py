@@ -1,13 +1,10 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-from sqlalchemy import text
-from db_utils import get_engine, DB_NAME
+from db_utils import run_queries
+from dashboard_queries import GENDER_TOTALS, RACE_TOTALS, SEARCH_RATE_BY_RACE
 
 
 def demographics_page():
-    engine = get_engine(DB_NAME)
-
     st.title("Demographic Patterns (Exploratory)")
 
     st.caption(
@@ -15,20 +12,17 @@ def demographics_page():
         "It does not imply causation or bias."
     )
 
+    # all three charts' queries run at once
+    results = run_queries({
+        "race": RACE_TOTALS,
+        "gender": GENDER_TOTALS,
+        "search": SEARCH_RATE_BY_RACE,
+    })
+
     # =============================
     # Stops by Race
     # =============================
-    race_query = text("""
-        SELECT
-            race,
-            COUNT(*) AS total
-        FROM traffic_violations
-        WHERE race IS NOT NULL
-        GROUP BY race
-        ORDER BY total DESC
-    """)
-
-    race_df = pd.read_sql(race_query, engine)
+    race_df = results["race"]
 
     st.subheader("Stops by Race")
     fig_race = px.bar(
@@ -41,16 +35,7 @@ def demographics_page():
     # =============================
     # Stops by Gender
     # =============================
-    gender_query = text("""
-        SELECT
-            gender,
-            COUNT(*) AS total
-        FROM traffic_violations
-        WHERE gender IS NOT NULL
-        GROUP BY gender
-    """)
-
-    gender_df = pd.read_sql(gender_query, engine)
+    gender_df = results["gender"]
 
     st.subheader("Stops by Gender")
     fig_gender = px.pie(
@@ -63,17 +48,7 @@ def demographics_page():
     # =============================
     # Search Rate by Race
     # =============================
-    search_query = text("""
-        SELECT
-            race,
-            AVG(search_conducted) AS search_rate
-        FROM traffic_violations
-        WHERE race IS NOT NULL
-        GROUP BY race
-        ORDER BY search_rate DESC
-    """)
-
-    search_df = pd.read_sql(search_query, engine)
+    search_df = results["search"]
 
     st.subheader("Search Rate by Race")
     fig_search = px.bar(
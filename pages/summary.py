@@ -1,38 +1,132 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from sqlalchemy import text, bindparam
-from datetime import date
-from db_utils import get_engine, DB_NAME
+from db_utils import run_queries
+from dashboard_queries import (
+    DEFAULT_END_DATE,
+    DEFAULT_START_DATE,
+    FILTER_PAGE_SIZE,
+    LIST_FILTERS,
+    filter_values_query,
+    geo_bins_query,
+    state_ranking_query,
+    summary_filter,
+    summary_kpis_query,
+    summary_rows_query,
+)
 
 # =============================
-# Cached metadata loaders
+# Filter options (rollup_filter_values)
 # =============================
 
-@st.cache_data(ttl=3600)
-def load_filter_values():
-    engine = get_engine(DB_NAME)
+def load_filter_values(prefixes, pages):
+    """
+    {dimension: DataFrame(value, total)} with the first pages[dimension]
+    pages of values starting with prefixes[dimension], most frequent first.
+    Every page is its own cached query; all of them run concurrently.
+    """
     queries = {
-        "state": "SELECT DISTINCT state FROM traffic_violations WHERE state IS NOT NULL",
-        "charge": "SELECT DISTINCT charge FROM traffic_violations WHERE charge IS NOT NULL",
-        "agency": "SELECT DISTINCT agency FROM traffic_violations WHERE agency IS NOT NULL",
-        "subagency": "SELECT DISTINCT subagency FROM traffic_violations WHERE subagency IS NOT NULL",
+        (name, page): filter_values_query(name, prefixes[name], page)
+        for name in LIST_FILTERS
+        for page in range(pages[name])
+    }
+    results = run_queries(queries, ttl=3600)
+    return {
+        name: pd.concat([df for (dimension, _), df in results.items() if dimension == name], ignore_index=True)
+        for name in LIST_FILTERS
     }
 
-    values = {}
-    for key, q in queries.items():
-        df = pd.read_sql(q, engine)
-        values[key] = sorted(df.iloc[:, 0].tolist())
 
-    return values
+def _reset_pages(name):
+    st.session_state[f"filter_{name}_pages"] = 1
 
 
-def summary_page():
-    engine = get_engine(DB_NAME)
+def filter_multiselect(label, name, values):
+    """
+    multiselect over the loaded options, each shown with its count; a search
+    box narrows them by prefix and "More" loads the next page
+    """
+    counts = dict(zip(values["value"], values["total"]))
+    pages = st.session_state[f"filter_{name}_pages"]
+
+    if st.session_state.get(f"filter_{name}_search") or len(values) >= FILTER_PAGE_SIZE:
+        st.text_input(
+            f"Search {label}",
+            key=f"filter_{name}_search",
+            placeholder="starts with…",
+            on_change=_reset_pages,
+            args=(name,),
+        )
+
+    # earlier selections stay valid options when the search changes
+    selected = st.session_state.get(f"filter_{name}", [])
+    options = list(dict.fromkeys(list(selected) + list(counts)))
+    choice = st.multiselect(
+        label,
+        options,
+        key=f"filter_{name}",
+        format_func=lambda v: f"{v} ({counts[v]:,})" if v in counts else v,
+    )
+
+    if len(values) == pages * FILTER_PAGE_SIZE and st.button(f"More {label} values", key=f"filter_{name}_more"):
+        st.session_state[f"filter_{name}_pages"] = pages + 1
+        st.rerun()
+    return choice
+
+
+# =============================
+# Geo binning
+# =============================
+
+# grid cell edge in degrees; "Auto" picks one from the date range
+CELL_SIZES = [0.5, 0.1, 0.05, 0.02, 0.01, 0.005]
+
+
+def auto_cell_size(start_date, end_date):
+    """coarser cells for longer ranges, so the number of cells stays small"""
+    days = (end_date - start_date).days
+    if days > 3 * 365:
+        return 0.02
+    if days > 365:
+        return 0.01
+    return 0.005
+
+
+def geo_cells(binned: pd.DataFrame, cell: float) -> pd.DataFrame:
+    """
+    (lat_bin, lon_bin, violation_type, total) rows → one row per cell with
+    its center, total count and dominant violation type
+    """
+    if binned.empty:
+        return binned
+
+    binned = binned.astype({"lat_bin": "int64", "lon_bin": "int64", "total": "int64"})
+    by_cell = binned.groupby(["lat_bin", "lon_bin"])
+
+    dominant = binned.loc[by_cell["total"].idxmax(), ["lat_bin", "lon_bin", "violation_type"]]
+
+    cells = (
+        by_cell["total"].sum()
+        .reset_index()
+        .merge(dominant, on=["lat_bin", "lon_bin"])
+        .rename(columns={"violation_type": "dominant_violation_type"})
+    )
+    cells["latitude"] = (cells["lat_bin"] + 0.5) * cell
+    cells["longitude"] = (cells["lon_bin"] + 0.5) * cell
+    return cells
+
+
+def _rate(value):
+    return "–" if pd.isna(value) else f"{float(value):.1%}"
 
+
+def summary_page():
     st.title("Traffic Violations – Summary Statistics")
 
-    filter_values = load_filter_values()
+    # search text / page count of every filter, from the previous run's widgets
+    prefixes = {name: st.session_state.get(f"filter_{name}_search", "") for name in LIST_FILTERS}
+    pages = {name: st.session_state.setdefault(f"filter_{name}_pages", 1) for name in LIST_FILTERS}
+    filter_values = load_filter_values(prefixes, pages)
 
     left, center, right = st.columns([1.2, 3, 1])
 
@@ -44,13 +138,13 @@ def summary_page():
 
         start_date, end_date = st.date_input(
             "Date range",
-            value=(date(2016, 1, 1), date(2023, 12, 31))
+            value=(DEFAULT_START_DATE, DEFAULT_END_DATE)
         )
 
-        state = st.multiselect("State", filter_values["state"])
-        charge = st.multiselect("Charge", filter_values["charge"])
-        agency = st.multiselect("Agency", filter_values["agency"])
-        subagency = st.multiselect("Sub-Agency", filter_values["subagency"])
+        state = filter_multiselect("State", "state", filter_values["state"])
+        charge = filter_multiselect("Charge", "charge", filter_values["charge"])
+        agency = filter_multiselect("Agency", "agency", filter_values["agency"])
+        subagency = filter_multiselect("Sub-Agency", "subagency", filter_values["subagency"])
 
         violation_type = st.selectbox(
             "Violation Type",
@@ -67,92 +161,90 @@ def summary_page():
             ["All", "Yes", "No"]
         )
 
-    # =============================
-    # WHERE clause construction
-    # =============================
-    where_clauses = [
-        "stop_datetime BETWEEN :start_date AND :end_date",
-        "latitude IS NOT NULL",
-        "longitude IS NOT NULL"
-    ]
-
-    params = {
-        "start_date": start_date,
-        "end_date": end_date
-    }
-
-    if state:
-        where_clauses.append("state IN :state")
-        params["state"] = state
-
-    if charge:
-        where_clauses.append("charge IN :charge")
-        params["charge"] = charge
-
-    if agency:
-        where_clauses.append("agency IN :agency")
-        params["agency"] = agency
-
-    if subagency:
-        where_clauses.append("subagency IN :subagency")
-        params["subagency"] = subagency
-
-    if violation_type != "All":
-        where_clauses.append("violation_type = :violation_type")
-        params["violation_type"] = violation_type
+        st.subheader("Map")
 
-    if alcohol != "All":
-        where_clauses.append("alcohol = :alcohol")
-        params["alcohol"] = alcohol == "Yes"
+        map_mode = st.radio(
+            "Show",
+            ["Density (all rows)", "Points (sample)"],
+            horizontal=True
+        )
 
-    if search != "All":
-        where_clauses.append("search_conducted = :search")
-        params["search"] = search == "Yes"
+        cell_choice = st.select_slider(
+            "Cell size (degrees)",
+            options=["Auto"] + CELL_SIZES,
+            value="Auto",
+            disabled=map_mode != "Density (all rows)"
+        )
 
-    where_sql = " AND ".join(where_clauses)
+    # =============================
+    # filter spec (compiled per query; statements are cached per filter shape)
+    # =============================
+    spec = summary_filter(
+        start_date, end_date,
+        state=state,
+        charge=charge,
+        agency=agency,
+        subagency=subagency,
+        violation_type=violation_type,
+        alcohol=alcohol,
+        search=search,
+    )
 
     # =============================
-    # MAIN DATA QUERY
+    # QUERIES, run concurrently: KPIs, state ranking and geo bins aggregate
+    # every matching row server-side; raw rows only for the points map
     # =============================
-    query = text(f"""
-            SELECT
-                latitude,
-                longitude,
-                state,
-                violation_type,
-                charge
-            FROM traffic_violations
-            WHERE {where_sql}
-            LIMIT 50000
-            """)
-
-    # Dynamically attach expanding bindparams
-    binds = []
-
-    if state:
-        binds.append(bindparam("state", expanding=True))
-    if charge:
-        binds.append(bindparam("charge", expanding=True))
-    if agency:
-        binds.append(bindparam("agency", expanding=True))
-    if subagency:
-        binds.append(bindparam("subagency", expanding=True))
-
-    if binds:
-        query = query.bindparams(*binds)
-
-    df = pd.read_sql(query, engine, params=params)
+    cell = auto_cell_size(start_date, end_date) if cell_choice == "Auto" else cell_choice
+
+    queries = {
+        "kpis": summary_kpis_query(spec),
+        "states": state_ranking_query(spec),
+    }
+    if map_mode == "Density (all rows)":
+        queries["bins"] = geo_bins_query(spec, cell)
+    else:
+        queries["rows"] = summary_rows_query(spec)
+    results = run_queries(queries)
+
     # =============================
-    # CENTER: Point Map
+    # CENTER: KPI tiles + Map
     # =============================
     with center:
+        kpis = results["kpis"].iloc[0]
+        tiles = st.columns(4)
+        tiles[0].metric("Stops", f"{int(kpis['stops']):,}", f"{int(kpis['violations']):,} violations", delta_color="off")
+        tiles[1].metric("Citation share", _rate(kpis["citation_share"]))
+        tiles[2].metric("Search rate", _rate(kpis["search_rate"]))
+        tiles[3].metric("Accident rate", _rate(kpis["accident_rate"]))
+
         st.subheader("Violation Locations")
 
-        if df.empty:
+        if map_mode == "Density (all rows)":
+            cells = geo_cells(results["bins"], cell)
+
+            if cells.empty:
+                st.warning("No data available for selected filters.")
+            else:
+                st.caption(f"{cells['total'].sum():,} violations in {len(cells):,} cells of {cell}°")
+                fig = px.scatter_geo(
+                    cells,
+                    lat="latitude",
+                    lon="longitude",
+                    size="total",
+                    color="dominant_violation_type",
+                    hover_data={"total": ":,", "latitude": ":.3f", "longitude": ":.3f"},
+                    scope="usa",
+                    opacity=0.6,
+                    size_max=30,
+                    height=650
+                )
+                st.plotly_chart(fig, use_container_width=True)
+
+        elif results["rows"].empty:
             st.warning("No data available for selected filters.")
         else:
             fig = px.scatter_geo(
-                df,
+                results["rows"],
                 lat="latitude",
                 lon="longitude",
                 color="violation_type",
@@ -169,18 +261,14 @@ def summary_page():
     with right:
         st.subheader("Violations by State")
 
-        if not df.empty:
-            state_counts = (
-                df.groupby("state")
-                  .size()
-                  .sort_values(ascending=False)
-                  .head(10)
-            )
+        # top 10 over every matching row, counted server-side
+        state_counts = results["states"]
 
-            max_val = state_counts.max()
+        if not state_counts.empty:
+            max_val = state_counts["total"].max()
 
-            for state_code, count in state_counts.items():
-                st.caption(f"{state_code} ({count:,})")
+            for state_code, count in zip(state_counts["state"], state_counts["total"]):
+                st.caption(f"{state_code} ({int(count):,})")
                 st.progress(int((count / max_val) * 100))
         else:
             st.info("No data to display.")
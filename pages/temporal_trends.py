@@ -1,14 +1,10 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-from sqlalchemy import text, bindparam
-from datetime import date
-from db_utils import get_engine, DB_NAME
+from db_utils import run_queries
+from dashboard_queries import DEFAULT_END_DATE, DEFAULT_START_DATE, hour_weekday_query, monthly_trend_query, temporal_filter
 
 
 def temporal_trends_page():
-    engine = get_engine(DB_NAME)
-
     st.title("Temporal Trends Analysis")
 
     # =============================
@@ -19,7 +15,7 @@ def temporal_trends_page():
     with left:
         start_date, end_date = st.date_input(
             "Date Range",
-            value=(date(2016, 1, 1), date(2023, 12, 31))
+            value=(DEFAULT_START_DATE, DEFAULT_END_DATE)
         )
 
         violation_type = st.selectbox(
@@ -28,43 +24,18 @@ def temporal_trends_page():
         )
 
     # =============================
-    # SQL: Monthly trend
+    # SQL: Monthly trend + Hour × Weekday heatmap
     # =============================
-    where = ["stop_datetime BETWEEN :start AND :end"]
-    params = {"start": start_date, "end": end_date}
-
-    if violation_type != "All":
-        where.append("violation_type = :vtype")
-        params["vtype"] = violation_type
-
-    where_sql = " AND ".join(where)
-
-    monthly_query = text(f"""
-        SELECT
-            DATE_FORMAT(stop_datetime, '%Y-%m') AS month,
-            COUNT(*) AS total
-        FROM traffic_violations
-        WHERE {where_sql}
-        GROUP BY month
-        ORDER BY month
-    """)
-
-    monthly_df = pd.read_sql(monthly_query, engine, params=params)
-
-    # =============================
-    # SQL: Hour × Weekday heatmap
-    # =============================
-    heatmap_query = text(f"""
-        SELECT
-            HOUR(stop_datetime) AS hour,
-            DAYOFWEEK(stop_datetime) AS weekday,
-            COUNT(*) AS total
-        FROM traffic_violations
-        WHERE {where_sql}
-        GROUP BY hour, weekday
-    """)
-
-    heat_df = pd.read_sql(heatmap_query, engine, params=params)
+    # both charts read rollup_daily_hourly (maintained by the pipeline);
+    # the two queries run concurrently
+    spec = temporal_filter(start_date, end_date, violation_type)
+
+    results = run_queries({
+        "monthly": monthly_trend_query(spec),
+        "heat": hour_weekday_query(spec),
+    })
+    monthly_df = results["monthly"]
+    heat_df = results["heat"]
 
     # =============================
     # Visuals
@@ -1,30 +1,23 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-from sqlalchemy import text
-from db_utils import get_engine, DB_NAME
+from db_utils import run_queries
+from dashboard_queries import MAKE_MODEL_TOTALS, MAKE_TOTALS, VEHICLE_TYPE_TOTALS
 
 
 def vehicle_analysis_page():
-    engine = get_engine(DB_NAME)
-
     st.title("Vehicle Analysis")
 
+    # all three charts' queries run at once
+    results = run_queries({
+        "type": VEHICLE_TYPE_TOTALS,
+        "make": MAKE_TOTALS,
+        "model": MAKE_MODEL_TOTALS,
+    })
+
     # =============================
     # Vehicle Type Distribution
     # =============================
-    type_query = text("""
-        SELECT
-            vehicle_type,
-            COUNT(*) AS total
-        FROM traffic_violations
-        WHERE vehicle_type IS NOT NULL
-        GROUP BY vehicle_type
-        ORDER BY total DESC
-        LIMIT 15
-    """)
-
-    type_df = pd.read_sql(type_query, engine)
+    type_df = results["type"]
 
     st.subheader("Violations by Vehicle Type")
     fig_type = px.bar(
@@ -38,18 +31,7 @@ def vehicle_analysis_page():
     # =============================
     # Top Makes
     # =============================
-    make_query = text("""
-        SELECT
-            make,
-            COUNT(*) AS total
-        FROM traffic_violations
-        WHERE make IS NOT NULL
-        GROUP BY make
-        ORDER BY total DESC
-        LIMIT 15
-    """)
-
-    make_df = pd.read_sql(make_query, engine)
+    make_df = results["make"]
 
     st.subheader("Top Vehicle Makes")
     fig_make = px.bar(
@@ -62,19 +44,7 @@ def vehicle_analysis_page():
     # =============================
     # Make → Model hierarchy
     # =============================
-    model_query = text("""
-        SELECT
-            make,
-            model,
-            COUNT(*) AS total
-        FROM traffic_violations
-        WHERE make IS NOT NULL AND model IS NOT NULL
-        GROUP BY make, model
-        ORDER BY total DESC
-        LIMIT 100
-    """)
-
-    model_df = pd.read_sql(model_query, engine)
+    model_df = results["model"]
 
     st.subheader("Make → Model Breakdown")
     fig_sun = px.sunburst(
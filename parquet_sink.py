@@ -0,0 +1,255 @@
+import os
+import re
+import uuid
+from collections import OrderedDict
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from db_utils import SCHEMA_FILE
+from dimensions import KEY_COLUMNS
+from preprocess import flags_from_columns
+
+# =====================================================
+# Arrow schema derived from schema.sql
+# =====================================================
+
+TABLE_NAME = "traffic_violations"
+PARTITION_COLUMN = "stop_datetime"
+# one row per (seq_id, charge) after compaction, like the MySQL primary key
+DEDUPE_KEY = ["seq_id", "charge"]
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"  # pyarrow's hive null fallback
+
+# explicit partition types; without them pyarrow infers dictionaries and
+# cannot unify the NULL partition (rows without a stop_datetime)
+PARTITIONING = ds.partitioning(
+    pa.schema([("year", pa.int16()), ("month", pa.int8())]),
+    flavor="hive",
+)
+
+# DECIMAL is kept as float64: the cleaned chunks carry floats and a
+# decimal128 cast per chunk would cost more than it saves
+SQL_TO_ARROW = {
+    "VARCHAR": pa.string(),
+    "TEXT": pa.string(),
+    "DATETIME": pa.timestamp("us"),
+    "DECIMAL": pa.float64(),
+    "BOOLEAN": pa.bool_(),
+    # only flags is a plain TINYINT (UNSIGNED); the dimension keys are mapped below
+    "TINYINT": pa.uint8(),
+}
+
+_COLUMN_RE = re.compile(r"^\s*(\w+)\s+([A-Za-z]+)")
+_SKIP_WORDS = {"PRIMARY", "INDEX", "KEY", "UNIQUE", "CONSTRAINT", "PARTITION"}
+
+
+def arrow_schema_from_sql(schema_file=SCHEMA_FILE, table_name=TABLE_NAME):
+    """parses the CREATE TABLE block of schema.sql into a pyarrow schema"""
+    with open(schema_file, "r", encoding="utf-8") as f:
+        sql = f.read()
+
+    match = re.search(rf"CREATE TABLE\s+{table_name}\s*\((.*?)\n\)", sql, re.DOTALL | re.IGNORECASE)
+    if match is None:
+        raise ValueError(f"CREATE TABLE {table_name} not found in {schema_file}")
+
+    fields = []
+    for line in match.group(1).splitlines():
+        column = _COLUMN_RE.match(line)
+        if column is None or column.group(1).upper() in _SKIP_WORDS:
+            continue
+        # generated columns (stop_date, ...) are computed by MySQL, not stored in parquet
+        if "GENERATED ALWAYS" in line.upper():
+            continue
+
+        name, sql_type = column.groups()
+        # dimension keys (dimensions.py): parquet keeps the values, which the
+        # writer dictionary-encodes on its own
+        if name in KEY_COLUMNS:
+            name, sql_type = KEY_COLUMNS[name], "VARCHAR"
+        try:
+            arrow_type = SQL_TO_ARROW[sql_type.upper()]
+        except KeyError:
+            raise ValueError(f"no arrow type mapped for {name} {sql_type}") from None
+        fields.append(pa.field(name, arrow_type, nullable="NOT NULL" not in line.upper()))
+
+    return pa.schema(fields)
+
+
+# =====================================================
+# Streaming, partitioned sink
+# =====================================================
+
+class ParquetSink:
+    """
+    Appends cleaned chunks to a hive-partitioned dataset
+
+        <root>/year=2016/month=3/part-<run>-<n>.parquet
+
+    Each partition keeps an open ParquetWriter and every chunk becomes a new
+    row group, so nothing already written is rewritten. Every run writes its
+    own files, so re-running appends instead of overwriting. Readers can
+    prune by date with read_dataset(root, filters=[("year", "=", 2020)]).
+    """
+
+    def __init__(self, root, schema=None, compression="snappy", max_open_writers=64):
+        self.root = root
+        self.schema = schema if schema is not None else arrow_schema_from_sql()
+        self.compression = compression
+        self.max_open_writers = max_open_writers
+        self.run_id = uuid.uuid4().hex[:8]
+
+        self._writers = OrderedDict()  # (year, month) → ParquetWriter, LRU order
+        self._file_counts = {}
+        self.rows_written = 0
+
+    # ---- partition helpers ----
+    @staticmethod
+    def _partition_values(stop_datetime):
+        stop_datetime = pd.to_datetime(stop_datetime)  # no-op unless object dtype
+        return stop_datetime.dt.year, stop_datetime.dt.month
+
+    def _partition_dir(self, key):
+        year, month = (NULL_PARTITION if v is None else v for v in key)
+        return os.path.join(self.root, f"year={year}", f"month={month}")
+
+    def _writer(self, key):
+        if key in self._writers:
+            self._writers.move_to_end(key)
+            return self._writers[key]
+
+        if len(self._writers) >= self.max_open_writers:
+            _, oldest = self._writers.popitem(last=False)
+            oldest.close()
+
+        directory = self._partition_dir(key)
+        os.makedirs(directory, exist_ok=True)
+
+        n = self._file_counts.get(key, 0)
+        self._file_counts[key] = n + 1
+        path = os.path.join(directory, f"part-{self.run_id}-{n}.parquet")
+
+        writer = pq.ParquetWriter(path, self.schema, compression=self.compression)
+        self._writers[key] = writer
+        return writer
+
+    # ---- public API ----
+    def write(self, df):
+        if df.empty:
+            return
+
+        years, months = self._partition_values(df[PARTITION_COLUMN])
+        for (year, month), part in df.groupby([years, months], dropna=False, sort=False):
+            key = (
+                None if year != year else int(year),   # NaN → NULL partition
+                None if month != month else int(month),
+            )
+            table = pa.Table.from_pandas(part, schema=self.schema, preserve_index=False)
+            self._writer(key).write_table(table)
+
+        self.rows_written += len(df)
+
+    def close(self):
+        while self._writers:
+            _, writer = self._writers.popitem()
+            writer.close()
+
+    def compact(self):
+        """
+        closes the sink and compacts every partition this run wrote to (see
+        compact_partition); returns the duplicate rows dropped. A single
+        run can repeat a (seq_id, charge) too, so single-file partitions
+        are checked as well.
+        """
+        self.close()
+        return sum(
+            compact_partition(self._partition_dir(key), self.schema, self.compression, self.run_id)
+            for key in self._file_counts
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_dataset(root, columns=None, filters=None):
+    """reads (part of) a dataset written by ParquetSink into pandas"""
+    return pd.read_parquet(root, columns=columns, filters=filters, partitioning=PARTITIONING)
+
+
+# =====================================================
+# Compaction
+# =====================================================
+# Every run appends its own files, so a re-run over rows already written
+# (--full, or a chunk retried after a failure) leaves duplicates. A
+# (seq_id, charge) always lands in the same year/month partition, so
+# deduplicating each partition on its own deduplicates the dataset, and
+# readers (duckdb_backend, bitmap_index) can scan it as is.
+
+def _partition_files(directory):
+    """parquet files of one partition directory, oldest first"""
+    paths = [os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(".parquet")]
+    return sorted(paths, key=os.path.getmtime)
+
+
+def _conform(df, schema):
+    """rows of a file written with an older schema in `schema`'s columns"""
+    if "flags" in schema.names and "flags" not in df.columns:
+        df["flags"] = flags_from_columns(df)
+    for name in schema.names:
+        if name not in df.columns:
+            df[name] = None
+    return df[schema.names]
+
+
+def compact_partition(directory, schema=None, compression="snappy", run_id=None):
+    """
+    rewrites the files of one partition as a single file with one row per
+    DEDUPE_KEY; the oldest row is kept, like INSERT IGNORE. Returns the
+    duplicate rows dropped.
+    """
+    schema = schema if schema is not None else arrow_schema_from_sql()
+    paths = _partition_files(directory)
+    if not paths:
+        return 0
+
+    tables = [pq.read_table(path) for path in paths]
+    df = pd.concat([_conform(table.to_pandas(), schema) for table in tables], ignore_index=True)
+    compacted = df.drop_duplicates(DEDUPE_KEY)
+
+    # one file in the current layout without duplicates: nothing to rewrite
+    if len(paths) == 1 and len(compacted) == len(df) and set(schema.names) <= set(tables[0].column_names):
+        return 0
+
+    # the new file is in place before the old ones go, so a crash in
+    # between leaves duplicates (fixed by the next compaction), never gaps
+    name = f"part-{run_id or uuid.uuid4().hex[:8]}-compacted"
+    tmp = os.path.join(directory, f"_{name}.tmp")  # not *.parquet: invisible to readers
+    pq.write_table(pa.Table.from_pandas(compacted, schema=schema, preserve_index=False), tmp, compression=compression)
+    target = os.path.join(directory, f"{name}.parquet")
+    os.replace(tmp, target)
+    for path in paths:
+        if path != target:
+            os.remove(path)
+
+    return len(df) - len(compacted)
+
+
+def compact_dataset(root):
+    """compacts every partition of a ParquetSink dataset; returns the duplicate rows dropped"""
+    schema = arrow_schema_from_sql()
+    dropped = 0
+    for directory, _, files in os.walk(root):
+        if any(f.endswith(".parquet") for f in files):
+            dropped += compact_partition(directory, schema)
+    return dropped
+
+
+if __name__ == "__main__":
+    import sys
+
+    root = sys.argv[1] if len(sys.argv) > 1 else "traffic_cleaned"
+    print(f"[SUCCESS] {root}: {compact_dataset(root):,} duplicate rows dropped")
@@ -0,0 +1,191 @@
+import argparse
+import math
+import re
+import threading
+
+import pandas as pd
+from sqlalchemy import text
+
+from db_utils import get_engine, DB_NAME
+from rollups import FACT_TABLE, refresh_rollups
+
+# =====================================================
+# Yearly RANGE partitions of traffic_violations
+# =====================================================
+# schema.sql partitions the fact table by stop_year (a generated column,
+# 0 for rows without a stop_datetime):
+#
+#     p_old       stop_year < 2012 (and the NULL-datetime rows)
+#     p2012 ...   one partition per year
+#     p_future    everything after the last yearly partition
+#
+# The ingest adds the yearly partition for every year it is about to load
+# (split out of the empty p_future), so each year lands in its own
+# partition and date-bounded queries prune to the years they cover. Old
+# years are dropped or archived (moved to a standalone table) here:
+#
+#     python partitions.py list
+#     python partitions.py add 2027
+#     python partitions.py archive 2012
+#     python partitions.py drop 2012
+
+FIRST_YEAR = 2012
+FUTURE_PARTITION = "p_future"
+ARCHIVE_TABLE = FACT_TABLE + "_{year}"
+
+_YEAR_PARTITION = re.compile(r"^p(\d{4})$")
+
+# last year with its own partition, per database URL (saves a lookup per
+# chunk); inf for tables that are not partitioned
+_last_year = {}
+_last_year_lock = threading.Lock()
+
+
+def partition_name(year):
+    return f"p{int(year)}"
+
+
+# =====================================================
+# Inspection
+# =====================================================
+
+def list_partitions(engine, table=FACT_TABLE):
+    """partition name, upper bound and size per partition; empty if not partitioned"""
+    partitions = pd.read_sql(
+        text("""
+            SELECT
+                PARTITION_NAME AS name,
+                PARTITION_DESCRIPTION AS less_than,
+                TABLE_ROWS AS table_rows,
+                DATA_LENGTH + INDEX_LENGTH AS bytes
+            FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table
+            ORDER BY PARTITION_ORDINAL_POSITION
+        """),
+        engine,
+        params={"table": table},
+    )
+    return partitions[partitions["name"].notna()].reset_index(drop=True)
+
+
+def partition_years(engine):
+    names = list_partitions(engine)["name"]
+    return {int(m.group(1)) for m in map(_YEAR_PARTITION.match, names) if m}
+
+
+def is_partitioned(engine):
+    return engine.dialect.name == "mysql" and not list_partitions(engine).empty
+
+
+# =====================================================
+# Maintenance
+# =====================================================
+
+def add_year_partitions(engine, years):
+    """
+    splits the missing yearly partitions (up to max(years)) out of p_future;
+    years before the last yearly partition already have one or live in p_old
+    """
+    existing = partition_years(engine)
+    last = max(existing, default=FIRST_YEAR - 1)
+    new_years = list(range(last + 1, max(years) + 1))
+    if not new_years:
+        return []
+
+    definitions = [
+        f"PARTITION {partition_name(y)} VALUES LESS THAN ({y + 1})" for y in new_years
+    ] + [f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE"]
+
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"ALTER TABLE {FACT_TABLE} REORGANIZE PARTITION {FUTURE_PARTITION} INTO ("
+            + ", ".join(definitions) + ")"
+        ))
+    print(f"[INFO] Added partitions {', '.join(partition_name(y) for y in new_years)}")
+    return new_years
+
+
+def ensure_year_partitions(engine, months):
+    """
+    called by the ingest before a chunk is written: makes sure every year in
+    `months` (from rollups.touched_months) has its own partition. No-op for
+    non-MySQL engines and unpartitioned tables.
+    """
+    if engine.dialect.name != "mysql":
+        return
+
+    years = {m.year for m in months if m is not None}
+    if not years:
+        return
+
+    key = str(engine.url)
+    with _last_year_lock:
+        if key not in _last_year:
+            _last_year[key] = max(partition_years(engine), default=FIRST_YEAR - 1) if is_partitioned(engine) else math.inf
+
+        # earlier years already have a partition (or belong in p_old)
+        if max(years) > _last_year[key]:
+            add_year_partitions(engine, years)
+            _last_year[key] = max(years)
+
+
+def _year_months(year):
+    return set(pd.period_range(f"{year}-01", f"{year}-12", freq="M"))
+
+
+def drop_year(engine, year):
+    """
+    deletes a year of data (DROP PARTITION) and refreshes its rollup months;
+    rows for that year loaded later fall into the next partition up
+    """
+    with engine.begin() as conn:
+        conn.execute(text(f"ALTER TABLE {FACT_TABLE} DROP PARTITION {partition_name(year)}"))
+    print(f"[INFO] Dropped partition {partition_name(year)}")
+    _forget_years(engine)
+    refresh_rollups(engine, _year_months(year))
+
+
+def archive_year(engine, year):
+    """
+    moves a year into its own table (traffic_violations_<year>) with
+    EXCHANGE PARTITION, which swaps files instead of copying rows, then drops
+    the emptied partition; returns the archive table name
+    """
+    archive = ARCHIVE_TABLE.format(year=year)
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE TABLE {archive} LIKE {FACT_TABLE}"))
+        conn.execute(text(f"ALTER TABLE {archive} REMOVE PARTITIONING"))
+        conn.execute(text(
+            f"ALTER TABLE {FACT_TABLE} EXCHANGE PARTITION {partition_name(year)} WITH TABLE {archive}"
+        ))
+        conn.execute(text(f"ALTER TABLE {FACT_TABLE} DROP PARTITION {partition_name(year)}"))
+    print(f"[INFO] Archived partition {partition_name(year)} → {archive}")
+    _forget_years(engine)
+    refresh_rollups(engine, _year_months(year))
+    return archive
+
+
+def _forget_years(engine):
+    with _last_year_lock:
+        _last_year.pop(str(engine.url), None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Yearly partitions of traffic_violations")
+    parser.add_argument("action", choices=["list", "add", "drop", "archive"])
+    parser.add_argument("year", type=int, nargs="?")
+    args = parser.parse_args()
+
+    if args.action != "list" and args.year is None:
+        parser.error(f"{args.action} needs a year")
+
+    engine = get_engine(DB_NAME)
+    if args.action == "list":
+        print(list_partitions(engine).to_string(index=False))
+    elif args.action == "add":
+        add_year_partitions(engine, [args.year])
+    elif args.action == "drop":
+        drop_year(engine, args.year)
+    else:
+        archive_year(engine, args.year)
+    print("[SUCCESS] Done.")
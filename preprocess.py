@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 
+from instrumentation import StageClock
+
 # =====================================================
 # Normalization helpers
 # =====================================================
@@ -16,6 +18,27 @@ def normalize_boolean(series: pd.Series) -> pd.Series:
         .isin(BOOLEAN_TRUE)
     )
 
+def pack_flags(chunk: pd.DataFrame) -> np.ndarray:
+    """
+    the BOOLEAN_COLUMNS of a raw chunk as one uint8 bitmask per row (bit
+    FLAG_BITS[name]); normalize_boolean runs on each column's distinct
+    values only, missing values count as False
+    """
+    flags = np.zeros(len(chunk), dtype=np.uint8)
+    for col in BOOLEAN_COLUMNS:
+        codes, uniques = pd.factorize(chunk[col])
+        # one extra False at the end: code -1 (missing) lands on it
+        truth = np.append(normalize_boolean(pd.Series(uniques, dtype=object)).to_numpy(), False)
+        flags |= truth[codes].astype(np.uint8) << np.uint8(FLAG_BITS[OUTPUT_COLUMNS[col]])
+    return flags
+
+def flags_from_columns(df: pd.DataFrame) -> np.ndarray:
+    """the packed flags of cleaned rows from their boolean columns (DB names); missing counts as False"""
+    flags = np.zeros(len(df), dtype=np.uint8)
+    for name, bit in FLAG_BITS.items():
+        flags |= df[name].fillna(False).to_numpy(dtype=np.uint8) << np.uint8(bit)
+    return flags
+
 def normalize_text(series: pd.Series) -> pd.Series:
     return (
         series
@@ -47,169 +70,262 @@ def normalize_state(series: pd.Series) -> pd.Series:
         .where(series.str.len() == 2)
     )
 
+# =====================================================
+# Dictionary normalization (distinct values only)
+# =====================================================
+
+# raw → normalized values remembered per column across chunks; a column's
+# cache is dropped once it grows past the limit (e.g. Location)
+NORMALIZE_CACHE_LIMIT = 300_000
+
+_MISSING = object()  # cache key for NaN / None
+_normalize_cache = {}
+
+
+def clear_normalize_cache():
+    _normalize_cache.clear()
+
+
+def normalize_categorical(series: pd.Series, normalizer, cache_key=None) -> pd.Series:
+    """
+    Runs an element-wise normalizer (normalize_text, normalize_gender, ...)
+    over the distinct values of `series` only and maps the results back
+    through the factorize codes. Returns a categorical series.
+
+    With `cache_key` the raw → normalized mapping persists across chunks, so
+    later chunks only normalize values they introduce.
+    """
+    if cache_key is None:
+        cache = {}
+    else:
+        cache = _normalize_cache.setdefault((cache_key, normalizer.__name__), {})
+        if len(cache) > NORMALIZE_CACHE_LIMIT:
+            cache.clear()
+
+    codes, uniques = pd.factorize(series)
+    uniques = list(uniques)
+
+    new_values = [value for value in uniques if value not in cache]
+    if _MISSING not in cache:
+        new_values.append(np.nan)
+
+    if new_values:
+        normalized = normalizer(pd.Series(new_values, dtype=object)).tolist()
+        for raw, value in zip(new_values, normalized):
+            cache[_MISSING if raw is np.nan else raw] = value
+
+    # one slot per distinct raw value, plus a trailing slot for code -1
+    mapped = np.array([cache[value] for value in uniques] + [cache[_MISSING]], dtype=object)
+    category_codes, categories = pd.factorize(mapped)
+
+    return pd.Series(
+        pd.Categorical.from_codes(category_codes[codes], categories=categories),
+        index=series.index,
+        name=series.name,
+    )
+
 # =====================================================
 # Date / time handling
 # =====================================================
 
-def build_stop_datetime(df: pd.DataFrame) -> pd.Series:
-    date = pd.to_datetime(df["Date Of Stop"], errors="coerce")
+_TIME_PATTERN = r"^(\d{1,2}):(\d{1,2}):(\d{1,2})$"
+
+
+def _time_of_day_seconds(time_of_stop: pd.Series) -> np.ndarray:
+    """
+    Seconds since midnight for "HH:MM:SS" / "HH.MM.SS" values, NaN where the
+    value does not parse. Only the distinct values are parsed (a day has at
+    most 86,400 of them) and the result is gathered back through the codes.
+    """
+    codes, uniques = pd.factorize(time_of_stop)
 
-    time = (
-        df["Time Of Stop"]
+    parts = (
+        pd.Series(uniques, dtype=object)
         .astype(str)
         .str.replace(".", ":", regex=False)
+        .str.extract(_TIME_PATTERN)
+        .astype(float)
     )
-    time = pd.to_datetime(time, format="%H:%M:%S", errors="coerce").dt.time
+    hour, minute, second = parts[0], parts[1], parts[2]
+    valid = (hour < 24) & (minute < 60) & (second < 60)
+
+    seconds = (hour * 3600 + minute * 60 + second).where(valid).to_numpy()
+
+    # code -1 (missing) picks the trailing NaN
+    return np.append(seconds, np.nan)[codes]
+
+
+def _stop_date(date_of_stop: pd.Series) -> pd.Series:
+    """parses the distinct dates once (a few thousand per 1M rows)"""
+    codes, uniques = pd.factorize(date_of_stop)
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object), errors="coerce").to_numpy()
+
+    missing = np.array([np.datetime64("NaT")], dtype=parsed.dtype)
+    return pd.Series(np.concatenate([parsed, missing])[codes], index=date_of_stop.index)
 
-    return pd.to_datetime(
-        date.astype(str) + " " + time.astype(str),
-        errors="coerce"
-    )
+
+def build_stop_datetime(df: pd.DataFrame) -> pd.Series:
+    """
+    Date Of Stop + Time Of Stop → datetime64. The time is added as a
+    timedelta offset instead of round-tripping both through strings; any
+    unparseable date or time gives NaT.
+    """
+    date = _stop_date(df["Date Of Stop"])
+    seconds = _time_of_day_seconds(df["Time Of Stop"])
+
+    return date + pd.to_timedelta(seconds, unit="s")
 
 # =====================================================
 # Coordinate cleaning
 # =====================================================
 
-def clean_coordinates(df: pd.DataFrame) -> pd.DataFrame:
-    df["Latitude"] = pd.to_numeric(df["Latitude"], errors="coerce")
-    df["Longitude"] = pd.to_numeric(df["Longitude"], errors="coerce")
+def clean_lat_long(latitude: pd.Series, longitude: pd.Series):
+    """returns cleaned (latitude, longitude) float64 series; inputs are untouched"""
+    latitude = pd.to_numeric(latitude, errors="coerce")
+    longitude = pd.to_numeric(longitude, errors="coerce")
+
+    on_zero = (latitude == 0) | (longitude == 0)
 
-    df.loc[
-        (df["Latitude"] == 0) | (df["Longitude"] == 0),
-        ["Latitude", "Longitude"]
-    ] = np.nan
+    latitude = latitude.where(~on_zero & latitude.between(24, 50))
+    longitude = longitude.where(~on_zero & longitude.between(-125, -65))
 
-    df.loc[~df["Latitude"].between(24, 50), "Latitude"] = np.nan
-    df.loc[~df["Longitude"].between(-125, -65), "Longitude"] = np.nan
+    return latitude, longitude
 
+
+def clean_coordinates(df: pd.DataFrame) -> pd.DataFrame:
+    df["Latitude"], df["Longitude"] = clean_lat_long(df["Latitude"], df["Longitude"])
     return df
 
 # =====================================================
 # Main preprocessing function (chunk-safe)
 # =====================================================
 
-def preprocess_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
-    chunk = chunk.copy()
+TEXT_COLUMNS = [
+    "Agency", "SubAgency", "Description", "Location",
+    "Search Disposition", "Search Outcome", "Search Reason",
+    "VehicleType", "Model", "Make", "Color",
+    "Charge", "Violation Type"
+]
+
+BOOLEAN_COLUMNS = [
+    "Accident",
+    "Property Damage",
+    "Alcohol",
+    "Work Zone",
+    "Search Conducted",
+    "Personal Injury",
+    "Fatal"
+]
+
+# bit of each boolean column (DB name) in the packed `flags` column
+FLAG_BITS = {
+    "accident": 0,
+    "property_damage": 1,
+    "alcohol": 2,
+    "work_zone": 3,
+    "personal_injury": 4,
+    "fatal": 5,
+    "search_conducted": 6,
+}
+
+# final column selection for DB / EDA: raw CSV name → DB-friendly name,
+# in output order ("stop_datetime" is derived, not read)
+OUTPUT_COLUMNS = {
+    "SeqID": "seq_id",
+    "Violation Type": "violation_type",
+    "stop_datetime": "stop_datetime",
+
+    "Agency": "agency",
+    "SubAgency": "subagency",
+    "Location": "location",
+    "Description": "description",
+
+    "Latitude": "latitude",
+    "Longitude": "longitude",
+
+    "Accident": "accident",
+    "Property Damage": "property_damage",
+    "Alcohol": "alcohol",
+    "Work Zone": "work_zone",
+    "Personal Injury": "personal_injury",
+    "Fatal": "fatal",
+
+    "Search Conducted": "search_conducted",
+    "flags": "flags",
+    "Search Disposition": "search_disposition",
+    "Search Outcome": "search_outcome",
+    "Search Reason": "search_reason",
+
+    "VehicleType": "vehicle_type",
+    "Make": "make",
+    "Model": "model",
+    "Color": "color",
+
+    "Charge": "charge",
+    "Race": "race",
+    "Gender": "gender",
+    "State": "state",
+    "DL State": "dl_state",
+}
+
+# raw CSV columns preprocess_chunk reads; everything else in the file is
+# never parsed. Coordinates are read as floats, the rest as strings.
+DERIVED_COLUMNS = {"stop_datetime", "flags"}
+INPUT_COLUMNS = ["Date Of Stop", "Time Of Stop"] + [c for c in OUTPUT_COLUMNS if c not in DERIVED_COLUMNS]
+NUMERIC_INPUT_COLUMNS = ["Latitude", "Longitude"]
+
+
+def preprocess_chunk(chunk: pd.DataFrame, timings=None) -> pd.DataFrame:
+    """
+    Cleans one raw CSV chunk into the traffic_violations layout.
+
+    The raw chunk is never modified or copied: each output column is built
+    from its raw column and the result frame is assembled once. Columns keep
+    native dtypes (datetime64, float64, bool, category) with NaN / NaT for
+    missing values; converting those to NULL is left to the sinks.
+
+    With a `timings` dict, seconds spent per step are added to it.
+    """
+    clock = StageClock(timings)
+    cleaned = {}
 
     # ---- datetime ----
-    chunk["stop_datetime"] = build_stop_datetime(chunk)
+    cleaned["stop_datetime"] = build_stop_datetime(chunk)
+    clock.lap("datetime")
 
     # ---- text normalization ----
-    text_cols = [
-        "Agency", "SubAgency", "Description", "Location",
-        "Search Disposition", "Search Outcome", "Search Reason",
-        "VehicleType", "Model", "Make", "Color",
-        "Charge", "Violation Type"
-    ]
-
-    for col in text_cols:
-        if col in chunk.columns:
-            chunk[col] = normalize_text(chunk[col])
+    # normalized on distinct values only → categorical columns
+    for col in TEXT_COLUMNS:
+        cleaned[col] = normalize_categorical(chunk[col], normalize_text, col)
+    clock.lap("text")
 
     # ---- demographics / codes ----
-    chunk["Gender"] = normalize_gender(chunk["Gender"])
-    chunk["Race"] = normalize_text(chunk["Race"])
-    chunk["State"] = normalize_state(chunk["State"])
-    chunk["DL State"] = normalize_state(chunk["DL State"])
+    cleaned["Gender"] = normalize_categorical(chunk["Gender"], normalize_gender, "Gender")
+    cleaned["Race"] = normalize_categorical(chunk["Race"], normalize_text, "Race")
+    cleaned["State"] = normalize_categorical(chunk["State"], normalize_state, "State")
+    cleaned["DL State"] = normalize_categorical(chunk["DL State"], normalize_state, "DL State")
+    clock.lap("demographics")
 
     # ---- boolean columns ----
-    boolean_cols = [
-        "Accident",
-        "Property Damage",
-        "Alcohol",
-        "Work Zone",
-        "Search Conducted",
-        "Personal Injury",
-        "Fatal"
-    ]
-
-    for col in boolean_cols:
-        if col in chunk.columns:
-            chunk[col] = normalize_boolean(chunk[col])
+    # packed into one bitmask per row; the columns are read back from it
+    flags = pack_flags(chunk)
+    for col in BOOLEAN_COLUMNS:
+        cleaned[col] = pd.Series(flags & (1 << FLAG_BITS[OUTPUT_COLUMNS[col]]) != 0, index=chunk.index)
+    cleaned["flags"] = pd.Series(flags, index=chunk.index)
+    clock.lap("boolean")
 
     # ---- coordinates ----
-    chunk = clean_coordinates(chunk)
-
-    # ---- final column selection for DB / EDA ----
-    chunk = chunk[
-        [
-            "SeqID",
-            "Violation Type",
-            "stop_datetime",
-
-            "Agency",
-            "SubAgency",
-            "Location",
-            "Description",
-
-            "Latitude",
-            "Longitude",
-
-            "Accident",
-            "Property Damage",
-            "Alcohol",
-            "Work Zone",
-            "Personal Injury",
-            "Fatal",
-
-            "Search Conducted",
-            "Search Disposition",
-            "Search Outcome",
-            "Search Reason",
-
-            "VehicleType",
-            "Make",
-            "Model",
-            "Color",
-
-            "Charge",
-            "Race",
-            "Gender",
-            "State",
-            "DL State",
-        ]
-    ]
-
-
-    # ---- rename to DB-friendly names ----
-    chunk.columns = [
-        "seq_id",
-        "violation_type",
-        "stop_datetime",
-
-        "agency",
-        "subagency",
-        "location",
-        "description",
-
-        "latitude",
-        "longitude",
-
-        "accident",
-        "property_damage",
-        "alcohol",
-        "work_zone",
-        "personal_injury",
-        "fatal",
-
-        "search_conducted",
-        "search_disposition",
-        "search_outcome",
-        "search_reason",
-
-        "vehicle_type",
-        "make",
-        "model",
-        "color",
-
-        "charge",
-        "race",
-        "gender",
-        "state",
-        "dl_state",
-    ]
-
-    chunk = chunk.replace({np.nan: None})
-
-
-    return chunk
+    cleaned["Latitude"], cleaned["Longitude"] = clean_lat_long(chunk["Latitude"], chunk["Longitude"])
+    clock.lap("coordinates")
+
+    # ---- final column selection + rename to DB-friendly names ----
+    clean = pd.DataFrame(
+        {
+            db_col: cleaned[raw_col] if raw_col in cleaned else chunk[raw_col]
+            for raw_col, db_col in OUTPUT_COLUMNS.items()
+        },
+        index=chunk.index,
+        copy=False,
+    )
+    clock.lap("assemble")
+    return clean
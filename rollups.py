@@ -0,0 +1,266 @@
+from datetime import timedelta
+
+import pandas as pd
+from sqlalchemy import text
+
+from db_utils import get_engine, DB_NAME
+
+# =====================================================
+# Rollup (summary) tables
+# =====================================================
+# Small pre-aggregated tables the dashboard pages read instead of running
+# GROUP BY over traffic_violations on every rerun. Every rollup is keyed by
+# a date bucket (day or month of stop_datetime, NULL for rows without one),
+# which lets the pipeline refresh only the buckets a load touched. The
+# buckets are generated columns of the fact table (stop_date, stop_month)
+# with a covering index per rollup, so a refresh is one index range scan.
+# The scans group by dimension keys (dimensions.py); the rollups store the
+# values, joined in after the GROUP BY.
+
+FACT_TABLE = "traffic_violations"
+
+ROLLUPS = {
+    # monthly trend (month × violation_type) and hour × weekday heatmap
+    "rollup_daily_hourly": {
+        "bucket": "stop_date",
+        "ddl": """
+            CREATE TABLE IF NOT EXISTS rollup_daily_hourly (
+                stop_date DATE,
+                stop_hour TINYINT,
+                violation_type VARCHAR(50),
+                total INT NOT NULL,
+                INDEX idx_rollup_daily (stop_date, violation_type)
+            )
+        """,
+        "select": """
+            SELECT b.stop_date, b.stop_hour, vt.value AS violation_type, b.total
+            FROM (
+                SELECT
+                    stop_date,
+                    stop_hour,
+                    violation_type_id,
+                    COUNT(*) AS total
+                FROM traffic_violations
+                WHERE {where}
+                GROUP BY 1, 2, 3
+            ) b
+            LEFT JOIN dim_violation_type vt ON vt.id = b.violation_type_id
+        """,
+    },
+    # race × gender with search counts (search_known = non-NULL search_conducted)
+    "rollup_demographics": {
+        "bucket": "stop_month",
+        "ddl": """
+            CREATE TABLE IF NOT EXISTS rollup_demographics (
+                stop_month DATE,
+                race VARCHAR(50),
+                gender VARCHAR(10),
+                total INT NOT NULL,
+                searched INT NOT NULL,
+                search_known INT NOT NULL,
+                INDEX idx_rollup_demographics (stop_month)
+            )
+        """,
+        "select": """
+            SELECT b.stop_month, r.value AS race, g.value AS gender, b.total, b.searched, b.search_known
+            FROM (
+                SELECT
+                    stop_month,
+                    race_id,
+                    gender_id,
+                    COUNT(*) AS total,
+                    COALESCE(SUM(CASE WHEN search_conducted THEN 1 ELSE 0 END), 0) AS searched,
+                    COUNT(search_conducted) AS search_known
+                FROM traffic_violations
+                WHERE {where}
+                GROUP BY 1, 2, 3
+            ) b
+            LEFT JOIN dim_race r ON r.id = b.race_id
+            LEFT JOIN dim_gender g ON g.id = b.gender_id
+        """,
+    },
+    # vehicle_type / make / model
+    "rollup_vehicle": {
+        "bucket": "stop_month",
+        "ddl": """
+            CREATE TABLE IF NOT EXISTS rollup_vehicle (
+                stop_month DATE,
+                vehicle_type VARCHAR(50),
+                make VARCHAR(50),
+                model VARCHAR(50),
+                total INT NOT NULL,
+                INDEX idx_rollup_vehicle (stop_month)
+            )
+        """,
+        "select": """
+            SELECT b.stop_month, vt.value AS vehicle_type, mk.value AS make, md.value AS model, b.total
+            FROM (
+                SELECT
+                    stop_month,
+                    vehicle_type_id,
+                    make_id,
+                    model_id,
+                    COUNT(*) AS total
+                FROM traffic_violations
+                WHERE {where}
+                GROUP BY 1, 2, 3, 4
+            ) b
+            LEFT JOIN dim_vehicle_type vt ON vt.id = b.vehicle_type_id
+            LEFT JOIN dim_make mk ON mk.id = b.make_id
+            LEFT JOIN dim_model md ON md.id = b.model_id
+        """,
+    },
+    # value counts of the summary page's multiselect filters (one row per
+    # month × dimension × value), read with prefix search and pagination
+    "rollup_filter_values": {
+        "bucket": "stop_month",
+        "ddl": """
+            CREATE TABLE IF NOT EXISTS rollup_filter_values (
+                stop_month DATE,
+                dimension VARCHAR(20) NOT NULL,
+                value VARCHAR(255) NOT NULL,
+                total INT NOT NULL,
+                INDEX idx_rollup_filter_values (dimension, value),
+                INDEX idx_rollup_filter_month (stop_month)
+            )
+        """,
+        "select": """
+            SELECT b.stop_month, 'state' AS dimension, d.value AS value, b.total
+            FROM (
+                SELECT stop_month, state_id, COUNT(*) AS total
+                FROM traffic_violations
+                WHERE {where} AND state_id IS NOT NULL
+                GROUP BY 1, 2
+            ) b
+            JOIN dim_state d ON d.id = b.state_id
+            UNION ALL
+            SELECT stop_month, 'charge', charge, COUNT(*)
+            FROM traffic_violations
+            WHERE {where} AND charge IS NOT NULL
+            GROUP BY 1, 2, 3
+            UNION ALL
+            SELECT b.stop_month, 'agency', d.value, b.total
+            FROM (
+                SELECT stop_month, agency_id, COUNT(*) AS total
+                FROM traffic_violations
+                WHERE {where} AND agency_id IS NOT NULL
+                GROUP BY 1, 2
+            ) b
+            JOIN dim_agency d ON d.id = b.agency_id
+            UNION ALL
+            SELECT b.stop_month, 'subagency', d.value, b.total
+            FROM (
+                SELECT stop_month, subagency_id, COUNT(*) AS total
+                FROM traffic_violations
+                WHERE {where} AND subagency_id IS NOT NULL
+                GROUP BY 1, 2
+            ) b
+            JOIN dim_subagency d ON d.id = b.subagency_id
+        """,
+    },
+}
+
+
+def ensure_rollup_tables(engine):
+    with engine.begin() as conn:
+        for spec in ROLLUPS.values():
+            conn.execute(text(spec["ddl"]))
+
+
+# =====================================================
+# Tracking which months a load touched
+# =====================================================
+
+def touched_months(df):
+    """
+    Months (as pd.Period) covered by a cleaned chunk; None stands for rows
+    without a stop_datetime.
+    """
+    months = set(df["stop_datetime"].dropna().dt.to_period("M").unique())
+    if df["stop_datetime"].isna().any():
+        months.add(None)
+    return months
+
+
+def _month_ranges(months):
+    """collapses months into contiguous [start, end) date ranges"""
+    ordered = sorted(m for m in months if m is not None)
+    ranges = []
+    for month in ordered:
+        if ranges and ranges[-1][1] == month:
+            ranges[-1][1] = month + 1
+        else:
+            ranges.append([month, month + 1])
+    return [(start.start_time.date(), end.start_time.date()) for start, end in ranges]
+
+
+# =====================================================
+# Refresh
+# =====================================================
+
+def _refresh_bucket(conn, table, spec, where_fact, where_rollup, params):
+    conn.execute(text(f"DELETE FROM {table} WHERE {where_rollup}"), params)
+    conn.execute(
+        text(f"INSERT INTO {table} " + spec["select"].format(where=where_fact)),
+        params,
+    )
+
+
+def refresh_rollups(engine, months):
+    """
+    Recomputes the rollup rows for the given months from the fact table.
+    Rebuilding from traffic_violations (instead of adding chunk counts)
+    keeps the rollups exact when INSERT IGNORE skips duplicate rows.
+    """
+    if not months:
+        return
+
+    ensure_rollup_tables(engine)
+
+    for start, end in _month_ranges(months):
+        # stop_year bounds prune the fact table to the partitions involved
+        params = {"start": start, "end": end, "start_year": start.year, "end_year": (end - timedelta(days=1)).year}
+        with engine.begin() as conn:
+            for table, spec in ROLLUPS.items():
+                bucket = spec["bucket"]
+                where = f"{bucket} >= :start AND {bucket} < :end"
+                _refresh_bucket(
+                    conn, table, spec,
+                    where_fact=f"{where} AND stop_year BETWEEN :start_year AND :end_year",
+                    where_rollup=where,
+                    params=params,
+                )
+        print(f"[INFO] Refreshed rollups for {start} .. {end}")
+
+    if None in months:
+        with engine.begin() as conn:
+            for table, spec in ROLLUPS.items():
+                where = f"{spec['bucket']} IS NULL"
+                _refresh_bucket(conn, table, spec, where_fact=f"{where} AND stop_year = 0", where_rollup=where, params={})
+        print("[INFO] Refreshed rollups for rows without stop_datetime")
+
+
+def rebuild_rollups(engine):
+    """full rebuild over every month present in the fact table"""
+    ensure_rollup_tables(engine)
+
+    months_df = pd.read_sql(
+        text(f"""
+            SELECT DISTINCT stop_month AS month
+            FROM {FACT_TABLE}
+        """),
+        engine,
+    )
+
+    months = {None if pd.isna(m) else pd.Period(m, freq="M") for m in months_df["month"]}
+
+    with engine.begin() as conn:
+        for table in ROLLUPS:
+            conn.execute(text(f"DELETE FROM {table}"))
+
+    refresh_rollups(engine, months)
+
+
+if __name__ == "__main__":
+    rebuild_rollups(get_engine(DB_NAME))
+    print("[SUCCESS] Rollup tables rebuilt.")
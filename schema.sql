@@ -3,15 +3,18 @@ USE traffic_db;
 
 DROP TABLE IF EXISTS traffic_violations;
 
+-- low-cardinality text columns are stored as <column>_id keys into the
+-- dim_<column> tables (dim_state for state and dl_state), which the
+-- pipeline creates and fills while loading (see dimensions.py)
 CREATE TABLE traffic_violations (
     seq_id VARCHAR(50) NOT NULL,
     charge VARCHAR(50) NOT NULL,
 
-    violation_type VARCHAR(50),
+    violation_type_id TINYINT UNSIGNED,
     stop_datetime DATETIME,
 
-    agency VARCHAR(50),
-    subagency VARCHAR(100),
+    agency_id TINYINT UNSIGNED,
+    subagency_id TINYINT UNSIGNED,
     location TEXT,
     description TEXT,
 
@@ -26,26 +29,70 @@ CREATE TABLE traffic_violations (
     fatal BOOLEAN,
 
     search_conducted BOOLEAN,
+    -- the seven flags above packed into one bitmask (preprocess.FLAG_BITS),
+    -- for combined-flag filters: flags & mask = mask
+    flags TINYINT UNSIGNED NOT NULL DEFAULT 0,
     search_disposition VARCHAR(100),
     search_outcome VARCHAR(100),
     search_reason VARCHAR(100),
 
-    vehicle_type VARCHAR(50),
-    make VARCHAR(50),
-    model VARCHAR(50),
-    color VARCHAR(30),
+    vehicle_type_id TINYINT UNSIGNED,
+    make_id SMALLINT UNSIGNED,
+    model_id SMALLINT UNSIGNED,
+    color_id TINYINT UNSIGNED,
 
-    race VARCHAR(50),
-    gender VARCHAR(10),
-    state VARCHAR(10),
-    dl_state VARCHAR(10),
+    race_id TINYINT UNSIGNED,
+    gender_id TINYINT UNSIGNED,
+    state_id TINYINT UNSIGNED,
+    dl_state_id TINYINT UNSIGNED,
 
-    PRIMARY KEY (seq_id, charge),
+    -- date buckets of stop_datetime for the rollup refreshes
+    stop_date DATE GENERATED ALWAYS AS (DATE(stop_datetime)) STORED,
+    stop_month DATE GENERATED ALWAYS AS (DATE(stop_datetime) - INTERVAL (DAYOFMONTH(stop_datetime) - 1) DAY) STORED,
+    stop_hour TINYINT GENERATED ALWAYS AS (HOUR(stop_datetime)) STORED,
+    stop_weekday TINYINT GENERATED ALWAYS AS (DAYOFWEEK(stop_datetime)) STORED,
+    -- partition key: 0 for rows without a stop_datetime
+    stop_year SMALLINT GENERATED ALWAYS AS (COALESCE(YEAR(stop_datetime), 0)) STORED NOT NULL,
 
-    INDEX idx_stop_datetime (stop_datetime),
-    INDEX idx_location (latitude, longitude),
-    INDEX idx_vehicle (vehicle_type, make),
-    INDEX idx_demographics (race, gender),
-    INDEX idx_search (search_conducted)
+    -- a partitioned table's primary key must contain the partition key,
+    -- but stop_year follows from the stop, so (seq_id, charge) stays unique
+    PRIMARY KEY (seq_id, charge, stop_year),
+
+    -- summary page: date range scan covering the map / table columns
+    -- (secondary indexes carry the primary key, so charge is covered too)
+    INDEX idx_summary (stop_datetime, latitude, longitude, violation_type_id, state_id),
+
+    -- summary page IN-list filters
+    INDEX idx_state_date (state_id, stop_datetime),
+    INDEX idx_charge_date (charge, stop_datetime),
+    INDEX idx_agency_date (agency_id, stop_datetime),
+    INDEX idx_subagency_date (subagency_id, stop_datetime),
+
+    -- rollup refreshes: one covering range scan per day / month bucket
+    INDEX idx_daily_hourly (stop_date, stop_hour, violation_type_id),
+    INDEX idx_month_demographics (stop_month, race_id, gender_id, search_conducted),
+    INDEX idx_month_vehicle (stop_month, vehicle_type_id, make_id, model_id),
+    INDEX idx_month_filters (stop_month, state_id, agency_id, subagency_id)
+)
+-- one partition per year (see partitions.py), the ingest splits new years
+-- out of p_future before loading them
+PARTITION BY RANGE (stop_year) (
+    PARTITION p_old VALUES LESS THAN (2012),
+    PARTITION p2012 VALUES LESS THAN (2013),
+    PARTITION p2013 VALUES LESS THAN (2014),
+    PARTITION p2014 VALUES LESS THAN (2015),
+    PARTITION p2015 VALUES LESS THAN (2016),
+    PARTITION p2016 VALUES LESS THAN (2017),
+    PARTITION p2017 VALUES LESS THAN (2018),
+    PARTITION p2018 VALUES LESS THAN (2019),
+    PARTITION p2019 VALUES LESS THAN (2020),
+    PARTITION p2020 VALUES LESS THAN (2021),
+    PARTITION p2021 VALUES LESS THAN (2022),
+    PARTITION p2022 VALUES LESS THAN (2023),
+    PARTITION p2023 VALUES LESS THAN (2024),
+    PARTITION p2024 VALUES LESS THAN (2025),
+    PARTITION p2025 VALUES LESS THAN (2026),
+    PARTITION p2026 VALUES LESS THAN (2027),
+    PARTITION p_future VALUES LESS THAN MAXVALUE
 );
 
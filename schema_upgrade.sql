@@ -0,0 +1,182 @@
+-- Upgrades an existing traffic_db created from an older schema.sql.
+-- New databases get all of this from schema.sql directly.
+--
+--     mysql -u root -p traffic_db < schema_upgrade.sql
+--
+-- then rebuild the rollups (python rollups.py) and check the plans
+-- (python explain_check.py).
+
+USE traffic_db;
+
+-- generated date buckets + indexes matched to the page queries
+ALTER TABLE traffic_violations
+    ADD COLUMN stop_date DATE GENERATED ALWAYS AS (DATE(stop_datetime)) STORED,
+    ADD COLUMN stop_month DATE GENERATED ALWAYS AS (DATE(stop_datetime) - INTERVAL (DAYOFMONTH(stop_datetime) - 1) DAY) STORED,
+    ADD COLUMN stop_hour TINYINT GENERATED ALWAYS AS (HOUR(stop_datetime)) STORED,
+    ADD COLUMN stop_weekday TINYINT GENERATED ALWAYS AS (DAYOFWEEK(stop_datetime)) STORED,
+    DROP INDEX idx_stop_datetime,
+    DROP INDEX idx_location,
+    DROP INDEX idx_vehicle,
+    DROP INDEX idx_demographics,
+    DROP INDEX idx_search,
+    ADD INDEX idx_summary (stop_datetime, latitude, longitude, violation_type, state),
+    ADD INDEX idx_state_date (state, stop_datetime),
+    ADD INDEX idx_charge_date (charge, stop_datetime),
+    ADD INDEX idx_agency_date (agency, stop_datetime),
+    ADD INDEX idx_subagency_date (subagency, stop_datetime),
+    ADD INDEX idx_daily_hourly (stop_date, stop_hour, violation_type),
+    ADD INDEX idx_month_demographics (stop_month, race, gender, search_conducted),
+    ADD INDEX idx_month_vehicle (stop_month, vehicle_type, make, model);
+
+-- filter value counts (rollup_filter_values) refresh; charge is covered
+-- through the primary key
+ALTER TABLE traffic_violations
+    ADD INDEX idx_month_filters (stop_month, state, agency, subagency);
+
+-- yearly RANGE partitions on stop_year (rebuilds the table: plan for the
+-- time and disk of a full copy); the primary key gains the partition key
+ALTER TABLE traffic_violations
+    ADD COLUMN stop_year SMALLINT GENERATED ALWAYS AS (COALESCE(YEAR(stop_datetime), 0)) STORED NOT NULL,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (seq_id, charge, stop_year);
+
+ALTER TABLE traffic_violations
+PARTITION BY RANGE (stop_year) (
+    PARTITION p_old VALUES LESS THAN (2012),
+    PARTITION p2012 VALUES LESS THAN (2013),
+    PARTITION p2013 VALUES LESS THAN (2014),
+    PARTITION p2014 VALUES LESS THAN (2015),
+    PARTITION p2015 VALUES LESS THAN (2016),
+    PARTITION p2016 VALUES LESS THAN (2017),
+    PARTITION p2017 VALUES LESS THAN (2018),
+    PARTITION p2018 VALUES LESS THAN (2019),
+    PARTITION p2019 VALUES LESS THAN (2020),
+    PARTITION p2020 VALUES LESS THAN (2021),
+    PARTITION p2021 VALUES LESS THAN (2022),
+    PARTITION p2022 VALUES LESS THAN (2023),
+    PARTITION p2023 VALUES LESS THAN (2024),
+    PARTITION p2024 VALUES LESS THAN (2025),
+    PARTITION p2025 VALUES LESS THAN (2026),
+    PARTITION p2026 VALUES LESS THAN (2027),
+    PARTITION p_future VALUES LESS THAN MAXVALUE
+);
+
+-- star schema: the low-cardinality text columns become integer keys into
+-- dimension tables (the DDL dimensions.py uses). Fills the dimensions, sets
+-- the keys in one UPDATE pass, then drops the text columns and rebuilds the
+-- indexes on the keys; the binary collation keeps values that differ only
+-- in case apart, as the ingest does
+CREATE TABLE IF NOT EXISTS dim_violation_type (id TINYINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY, value VARCHAR(50) COLLATE utf8mb4_bin NOT NULL, UNIQUE (value));
+CREATE TABLE IF NOT EXISTS dim_agency (id TINYINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY, value VARCHAR(50) COLLATE utf8mb4_bin NOT NULL, UNIQUE (value));
+CREATE TABLE IF NOT EXISTS dim_subagency (id TINYINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY, value VARCHAR(100) COLLATE utf8mb4_bin NOT NULL, UNIQUE (value));
+CREATE TABLE IF NOT EXISTS dim_vehicle_type (id TINYINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY, value VARCHAR(50) COLLATE utf8mb4_bin NOT NULL, UNIQUE (value));
+CREATE TABLE IF NOT EXISTS dim_make (id SMALLINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY, value VARCHAR(50) COLLATE utf8mb4_bin NOT NULL, UNIQUE (value));
+CREATE TABLE IF NOT EXISTS dim_model (id SMALLINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY, value VARCHAR(50) COLLATE utf8mb4_bin NOT NULL, UNIQUE (value));
+CREATE TABLE IF NOT EXISTS dim_color (id TINYINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY, value VARCHAR(30) COLLATE utf8mb4_bin NOT NULL, UNIQUE (value));
+CREATE TABLE IF NOT EXISTS dim_race (id TINYINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY, value VARCHAR(50) COLLATE utf8mb4_bin NOT NULL, UNIQUE (value));
+CREATE TABLE IF NOT EXISTS dim_gender (id TINYINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY, value VARCHAR(10) COLLATE utf8mb4_bin NOT NULL, UNIQUE (value));
+CREATE TABLE IF NOT EXISTS dim_state (id TINYINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY, value VARCHAR(10) COLLATE utf8mb4_bin NOT NULL, UNIQUE (value));
+
+INSERT IGNORE INTO dim_violation_type (value)
+    SELECT DISTINCT violation_type COLLATE utf8mb4_bin FROM traffic_violations WHERE violation_type IS NOT NULL;
+INSERT IGNORE INTO dim_agency (value)
+    SELECT DISTINCT agency COLLATE utf8mb4_bin FROM traffic_violations WHERE agency IS NOT NULL;
+INSERT IGNORE INTO dim_subagency (value)
+    SELECT DISTINCT subagency COLLATE utf8mb4_bin FROM traffic_violations WHERE subagency IS NOT NULL;
+INSERT IGNORE INTO dim_vehicle_type (value)
+    SELECT DISTINCT vehicle_type COLLATE utf8mb4_bin FROM traffic_violations WHERE vehicle_type IS NOT NULL;
+INSERT IGNORE INTO dim_make (value)
+    SELECT DISTINCT make COLLATE utf8mb4_bin FROM traffic_violations WHERE make IS NOT NULL;
+INSERT IGNORE INTO dim_model (value)
+    SELECT DISTINCT model COLLATE utf8mb4_bin FROM traffic_violations WHERE model IS NOT NULL;
+INSERT IGNORE INTO dim_color (value)
+    SELECT DISTINCT color COLLATE utf8mb4_bin FROM traffic_violations WHERE color IS NOT NULL;
+INSERT IGNORE INTO dim_race (value)
+    SELECT DISTINCT race COLLATE utf8mb4_bin FROM traffic_violations WHERE race IS NOT NULL;
+INSERT IGNORE INTO dim_gender (value)
+    SELECT DISTINCT gender COLLATE utf8mb4_bin FROM traffic_violations WHERE gender IS NOT NULL;
+INSERT IGNORE INTO dim_state (value)
+    SELECT state COLLATE utf8mb4_bin FROM traffic_violations WHERE state IS NOT NULL
+    UNION
+    SELECT dl_state COLLATE utf8mb4_bin FROM traffic_violations WHERE dl_state IS NOT NULL;
+
+ALTER TABLE traffic_violations
+    ADD COLUMN violation_type_id TINYINT UNSIGNED AFTER violation_type,
+    ADD COLUMN agency_id TINYINT UNSIGNED AFTER agency,
+    ADD COLUMN subagency_id TINYINT UNSIGNED AFTER subagency,
+    ADD COLUMN vehicle_type_id TINYINT UNSIGNED AFTER vehicle_type,
+    ADD COLUMN make_id SMALLINT UNSIGNED AFTER make,
+    ADD COLUMN model_id SMALLINT UNSIGNED AFTER model,
+    ADD COLUMN color_id TINYINT UNSIGNED AFTER color,
+    ADD COLUMN race_id TINYINT UNSIGNED AFTER race,
+    ADD COLUMN gender_id TINYINT UNSIGNED AFTER gender,
+    ADD COLUMN state_id TINYINT UNSIGNED AFTER state,
+    ADD COLUMN dl_state_id TINYINT UNSIGNED AFTER dl_state;
+
+UPDATE traffic_violations f
+    LEFT JOIN dim_violation_type vt ON vt.value = f.violation_type COLLATE utf8mb4_bin
+    LEFT JOIN dim_agency ag ON ag.value = f.agency COLLATE utf8mb4_bin
+    LEFT JOIN dim_subagency sa ON sa.value = f.subagency COLLATE utf8mb4_bin
+    LEFT JOIN dim_vehicle_type vh ON vh.value = f.vehicle_type COLLATE utf8mb4_bin
+    LEFT JOIN dim_make mk ON mk.value = f.make COLLATE utf8mb4_bin
+    LEFT JOIN dim_model md ON md.value = f.model COLLATE utf8mb4_bin
+    LEFT JOIN dim_color co ON co.value = f.color COLLATE utf8mb4_bin
+    LEFT JOIN dim_race ra ON ra.value = f.race COLLATE utf8mb4_bin
+    LEFT JOIN dim_gender ge ON ge.value = f.gender COLLATE utf8mb4_bin
+    LEFT JOIN dim_state st ON st.value = f.state COLLATE utf8mb4_bin
+    LEFT JOIN dim_state dl ON dl.value = f.dl_state COLLATE utf8mb4_bin
+SET
+    f.violation_type_id = vt.id,
+    f.agency_id = ag.id,
+    f.subagency_id = sa.id,
+    f.vehicle_type_id = vh.id,
+    f.make_id = mk.id,
+    f.model_id = md.id,
+    f.color_id = co.id,
+    f.race_id = ra.id,
+    f.gender_id = ge.id,
+    f.state_id = st.id,
+    f.dl_state_id = dl.id;
+
+ALTER TABLE traffic_violations
+    DROP INDEX idx_summary,
+    DROP INDEX idx_state_date,
+    DROP INDEX idx_agency_date,
+    DROP INDEX idx_subagency_date,
+    DROP INDEX idx_daily_hourly,
+    DROP INDEX idx_month_demographics,
+    DROP INDEX idx_month_vehicle,
+    DROP INDEX idx_month_filters,
+    DROP COLUMN violation_type,
+    DROP COLUMN agency,
+    DROP COLUMN subagency,
+    DROP COLUMN vehicle_type,
+    DROP COLUMN make,
+    DROP COLUMN model,
+    DROP COLUMN color,
+    DROP COLUMN race,
+    DROP COLUMN gender,
+    DROP COLUMN state,
+    DROP COLUMN dl_state,
+    ADD INDEX idx_summary (stop_datetime, latitude, longitude, violation_type_id, state_id),
+    ADD INDEX idx_state_date (state_id, stop_datetime),
+    ADD INDEX idx_agency_date (agency_id, stop_datetime),
+    ADD INDEX idx_subagency_date (subagency_id, stop_datetime),
+    ADD INDEX idx_daily_hourly (stop_date, stop_hour, violation_type_id),
+    ADD INDEX idx_month_demographics (stop_month, race_id, gender_id, search_conducted),
+    ADD INDEX idx_month_vehicle (stop_month, vehicle_type_id, make_id, model_id),
+    ADD INDEX idx_month_filters (stop_month, state_id, agency_id, subagency_id);
+
+-- packed incident flags (bit numbers: preprocess.FLAG_BITS), filled from
+-- the boolean columns of the existing rows
+ALTER TABLE traffic_violations
+    ADD COLUMN flags TINYINT UNSIGNED NOT NULL DEFAULT 0 AFTER search_conducted;
+
+UPDATE traffic_violations SET flags =
+    (accident IS TRUE)
+    | (property_damage IS TRUE) << 1
+    | (alcohol IS TRUE) << 2
+    | (work_zone IS TRUE) << 3
+    | (personal_injury IS TRUE) << 4
+    | (fatal IS TRUE) << 5
+    | (search_conducted IS TRUE) << 6;
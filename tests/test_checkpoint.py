@@ -0,0 +1,50 @@
+import pandas as pd
+
+from checkpoint import IngestCheckpoint
+from csv_reader import iter_chunks
+
+HEADER = "SeqID,Charge\n"
+
+
+def _read(csv_path, byte_range, row_offset):
+    chunks = list(iter_chunks(csv_path, byte_range=byte_range, row_offset=row_offset))
+    return pd.concat(chunks) if chunks else pd.DataFrame(columns=["SeqID", "Charge"])
+
+
+def _load(checkpoint, csv_path):
+    """one pipeline run: the planned range, marked loaded and completed"""
+    start, end, row_offset = checkpoint.plan()
+    if end is None:
+        return []
+    rows = _read(csv_path, (start, end), row_offset)
+    checkpoint.is_loaded(0, rows)
+    checkpoint.mark_loaded(0, len(rows), row_offset, [])
+    checkpoint.complete()
+    return rows["SeqID"].tolist()
+
+
+def test_last_row_without_trailing_newline_is_loaded(tmp_path):
+    csv_path = tmp_path / "source.csv"
+    csv_path.write_text(HEADER + "a,1\nb,2\nc,3")  # no newline after the last row
+
+    checkpoint = IngestCheckpoint(str(tmp_path / "checkpoint.json"), str(csv_path), chunk_size=10)
+    assert _load(checkpoint, str(csv_path)) == ["a", "b", "c"]
+
+    # nothing new: the next run loads nothing instead of re-reading "c"
+    assert checkpoint.plan()[1] is None
+
+
+def test_delta_load_holds_back_a_partial_last_line(tmp_path):
+    csv_path = tmp_path / "source.csv"
+    csv_path.write_text(HEADER + "a,1\nb,2\n")
+    checkpoint = IngestCheckpoint(str(tmp_path / "checkpoint.json"), str(csv_path), chunk_size=10)
+    assert _load(checkpoint, str(csv_path)) == ["a", "b"]
+
+    # appended while the writer is still on the last line
+    with open(csv_path, "a") as f:
+        f.write("c,3\nd,")
+    assert _load(checkpoint, str(csv_path)) == ["c"]
+
+    with open(csv_path, "a") as f:
+        f.write("4\n")
+    assert _load(checkpoint, str(csv_path)) == ["d"]
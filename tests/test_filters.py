@@ -0,0 +1,24 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from filters import Prefix, compile_query
+
+TEMPLATE = "SELECT value FROM filter_values WHERE {where} ORDER BY value"
+
+
+def test_prefix_is_literal_and_lower_cased():
+    _, params, _ = compile_query(TEMPLATE, (Prefix("value", "Md_1%"),))
+    assert params == {"value_prefix": "md!_1!%%"}
+
+
+def test_prefix_ignores_case_on_duckdb():
+    # DuckDB's LIKE is case-sensitive, MySQL's default collation is not
+    pytest.importorskip("duckdb_engine")
+    engine = create_engine("duckdb:///:memory:")
+    with engine.connect() as conn:
+        conn.execute(text("CREATE TABLE filter_values AS SELECT * FROM (VALUES ('MD'), ('Md_1'), ('VA')) t(value)"))
+        for prefix in ("md", "MD", "mD"):
+            statement, params, _ = compile_query(TEMPLATE, (Prefix("value", prefix),))
+            assert conn.execute(statement, params).scalars().all() == ["MD", "Md_1"]
+        statement, params, _ = compile_query(TEMPLATE, (Prefix("value", "md_"),))
+        assert conn.execute(statement, params).scalars().all() == ["Md_1"]
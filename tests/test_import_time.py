@@ -0,0 +1,18 @@
+import pytest
+
+from benchmarks.import_time import check, measure
+
+
+def test_startup_imports_within_budget():
+    # the pages need the dashboard dependencies; without them nothing can be measured
+    for package in ("streamlit", "plotly"):
+        pytest.importorskip(package)
+
+    results = measure(repeat=1)
+    errors = {case: r["error"] for case, r in results.items() if "error" in r}
+    if "startup" in errors:
+        pytest.skip(f"app.py not importable here: {errors['startup']}")
+
+    startup = {name.split(".")[0] for name in results["startup"]["modules"]}
+    assert "plotly" not in startup
+    assert check(results) == []
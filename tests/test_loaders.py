@@ -0,0 +1,64 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from loaders import LOADERS, get_loader
+
+TABLE = "violations"
+
+
+@pytest.fixture
+def engine(tmp_path):
+    # SQLite stand-in for MySQL: the loaders switch to INSERT OR IGNORE;
+    # like benchmarks.suite, teach sqlite3 pandas timestamps
+    sqlite3.register_adapter(pd.Timestamp, lambda ts: ts.isoformat(" "))
+    engine = create_engine(f"sqlite:///{tmp_path / 'load.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            CREATE TABLE {TABLE} (
+                seq_id VARCHAR(50) NOT NULL,
+                charge VARCHAR(50) NOT NULL,
+                stop_datetime DATETIME,
+                latitude DECIMAL(10, 7),
+                alcohol BOOLEAN,
+                PRIMARY KEY (seq_id, charge)
+            )
+        """))
+    yield engine
+    engine.dispose()
+
+
+def _chunk(keys, latitude):
+    return pd.DataFrame({
+        "seq_id": [seq_id for seq_id, _ in keys],
+        "charge": [charge for _, charge in keys],
+        "stop_datetime": pd.to_datetime(["2020-01-01 10:00"] * len(keys)),
+        "latitude": [latitude] * (len(keys) - 1) + [np.nan],
+        "alcohol": [False] * len(keys),
+    })
+
+
+# load_data falls back to executemany on non-MySQL engines
+@pytest.mark.parametrize("name", sorted(LOADERS))
+def test_overlapping_chunks_keep_first_rows(engine, name):
+    loader = get_loader(name)
+    first = _chunk([("a", "1"), ("a", "2"), ("b", "1")], latitude=39.1)
+    second = _chunk([("a", "2"), ("b", "1"), ("c", "1")], latitude=38.5)
+
+    loader(engine, TABLE, first, batch_size=2)
+    loader(engine, TABLE, second, batch_size=2)
+
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"SELECT seq_id, charge, latitude FROM {TABLE} ORDER BY seq_id, charge")).all()
+
+    # duplicate keys are skipped, the rows already loaded are left as they were
+    assert [(seq_id, charge) for seq_id, charge, _ in rows] == [("a", "1"), ("a", "2"), ("b", "1"), ("c", "1")]
+    assert [float(lat) if lat is not None else None for _, _, lat in rows] == [39.1, 39.1, None, None]
+
+
+def test_get_loader_rejects_unknown_name():
+    with pytest.raises(ValueError, match="unknown loader"):
+        get_loader("bulk_copy")
@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+
+from benchmarks import legacy
+from benchmarks.bench_preprocess_memory import measure
+from benchmarks.generator import generate_csv
+from preprocess import preprocess_chunk
+
+ROWS = 20_000
+
+# peak RSS growth of preprocess_chunk on ROWS rows; ~16 MiB measured, the
+# previous version needed ~31 MiB
+PEAK_BUDGET_MIB = 25
+
+
+@pytest.fixture(scope="module")
+def raw_csv(tmp_path_factory):
+    return generate_csv(str(tmp_path_factory.mktemp("raw") / "raw.csv"), ROWS, seed=7)
+
+
+def _as_objects(df):
+    """values only: the typed version returns categoricals / nullable dtypes"""
+    return df.astype(object).where(df.notna(), None)
+
+
+def test_matches_legacy_preprocess(raw_csv):
+    raw = pd.read_csv(raw_csv, low_memory=False)
+    typed = preprocess_chunk(raw).drop(columns="flags")
+    previous = legacy.preprocess_chunk(raw)
+
+    assert list(typed.columns) == list(previous.columns)
+    pd.testing.assert_frame_equal(_as_objects(typed), _as_objects(previous))
+
+
+def test_peak_memory_within_budget(raw_csv):
+    result = measure("typed", raw_csv, ROWS)
+    if not result["exact"]:
+        pytest.skip("peak RSS cannot be reset on this platform")
+    assert result["peak_mib"] < PEAK_BUDGET_MIB, f"{result['peak_mib']:.1f} MiB"